@@ -0,0 +1,225 @@
+"""Benchmarks of NiceTable - ingesting rows and rendering tables of various shapes and sizes.
+
+Run with `python -m nicetable.bench`, see `python -m nicetable.bench --help`. The results are printed as JSON
+(or saved with --output), and can be compared against the results of a previous run with --baseline."""
+import argparse
+import json
+import platform
+import re
+import sqlite3
+import sys
+import timeit
+from typing import List, Callable, Any, Dict, Optional, Tuple
+
+import nicetable
+from nicetable.nicetable import NiceTable
+
+SIZES = [10, 1000, 100000, 1000000]
+COL_NAMES = ['Name', 'Type', 'Height(cm)', 'Weight(kg)']
+TYPES = ['Grass/Poison', 'Electric', 'Psychic', 'Fire', 'Water']
+
+
+def make_rows(size: int) -> List[List[Any]]:
+    """Rows of a mixed table - two text columns, an int column and a float column"""
+    return list([f'Pokemon #{i}', TYPES[i % len(TYPES)], i % 250, i * 0.125] for i in range(size))
+
+
+def heavy_func(value: Any) -> Any:
+    """A CPU-heavy value_func (a module-level function, so it can also be sent to worker processes)"""
+    s = str(value)
+    for _ in range(20):
+        s = s.upper().lower()
+    return s
+
+
+def _ingest_scenario(row_type: str) -> Callable[[int], Callable[[], Any]]:
+    def setup(size: int) -> Callable[[], Any]:
+        rows = make_rows(size)
+        if row_type == 'tuple':
+            rows = list(map(tuple, rows))
+        elif row_type == 'dict':
+            rows = list(dict(zip(COL_NAMES, row)) for row in rows)
+
+        def run() -> NiceTable:
+            out = NiceTable(col_names=COL_NAMES)
+            for row in rows:
+                out.append(row)
+            return out
+        return run
+    return setup
+
+
+def _extend_scenario(size: int) -> Callable[[], Any]:
+    rows = make_rows(size)
+    return lambda: NiceTable(col_names=COL_NAMES).extend(rows)
+
+
+def _cursor_scenario(use_fetchall: bool) -> Callable[[int], Callable[[], Any]]:
+    def setup(size: int) -> Callable[[], Any]:
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE pokemon (name TEXT, type TEXT, height INT, weight REAL)')
+        conn.executemany('INSERT INTO pokemon VALUES (?, ?, ?, ?)', make_rows(size))
+
+        def run() -> NiceTable:
+            cursor = conn.execute('SELECT * FROM pokemon')
+            if use_fetchall:  # the way to load a cursor before from_cursor()
+                return NiceTable(cursor.fetchall(), col_names=list(column[0] for column in cursor.description))
+            return NiceTable.from_cursor(cursor)
+        return run
+    return setup
+
+
+def _construct_scenario(use_template: bool) -> Callable[[int], Callable[[], Any]]:
+    def setup(size: int) -> Callable[[], Any]:
+        rows = list([row] for row in make_rows(size))  # a small table per row, like a table per log record
+        template = NiceTable.template(layout='csv')
+
+        def run() -> List[NiceTable]:
+            if use_template:
+                return list(template.new(row, COL_NAMES) for row in rows)
+            return list(NiceTable(row, col_names=COL_NAMES, layout='csv') for row in rows)
+        return run
+    return setup
+
+
+def _render_scenario(make_table: Callable[[int], NiceTable]) -> Callable[[int], Callable[[], Any]]:
+    def setup(size: int) -> Callable[[], Any]:
+        out = make_table(size)
+
+        def run() -> str:
+            out._reset_columns_stats()  # a full render, not an incremental one
+            return str(out)
+        return run
+    return setup
+
+
+def _mixed_table(size: int, **kwargs: Any) -> NiceTable:
+    return NiceTable(make_rows(size), col_names=COL_NAMES, **kwargs)
+
+
+def _numeric_table(size: int) -> NiceTable:
+    return NiceTable(list([i, i * 7, i * 0.5, -i / 3] for i in range(size)), col_names=['a', 'b', 'c', 'd'])
+
+
+def _text_table(size: int) -> NiceTable:
+    return NiceTable(list([f'name{i}', TYPES[i % len(TYPES)], 'x' * (i % 20), str(i)] for i in range(size)),
+                     col_names=['a', 'b', 'c', 'd'])
+
+
+def _multi_line_table(size: int) -> NiceTable:
+    return NiceTable(list([f'Pokemon\n#{i}', 'Grass\nPoison', i, i * 0.125] for i in range(size)),
+                     col_names=COL_NAMES)
+
+
+def _wrapped_table(size: int) -> NiceTable:
+    return NiceTable(list([f'Pokemon number {i} of the list', 'Grass/Poison/Bug/Flying', i, i * 0.125]
+                          for i in range(size)), col_names=COL_NAMES, value_max_len=10)
+
+
+def get_scenarios() -> Dict[str, Callable[[int], Callable[[], Any]]]:
+    """The benchmark scenarios - a function per scenario name, that gets a number of rows and returns the code
+    to time (the setup itself is not timed)"""
+    scenarios = {
+        'ingest_list': _ingest_scenario('list'),
+        'ingest_tuple': _ingest_scenario('tuple'),
+        'ingest_dict': _ingest_scenario('dict'),
+        'ingest_extend': _extend_scenario,
+        'ingest_cursor': _cursor_scenario(use_fetchall=False),
+        'ingest_cursor_fetchall': _cursor_scenario(use_fetchall=True),
+        'construct_init': _construct_scenario(use_template=False),
+        'construct_template': _construct_scenario(use_template=True),
+    }
+    for layout, _ in NiceTable.builtin_layouts():
+        scenarios[f'render_{layout}'] = _render_scenario(lambda size, layout=layout: _mixed_table(size, layout=layout))
+    scenarios.update({
+        'render_numeric': _render_scenario(_numeric_table),
+        'render_text': _render_scenario(_text_table),
+        'render_multi_line': _render_scenario(_multi_line_table),
+        'render_wrapped': _render_scenario(_wrapped_table),
+        'render_value_func': _render_scenario(lambda size: _mixed_table(size, value_func=heavy_func)),
+    })
+    return scenarios
+
+
+def run_benchmarks(sizes: List[int], repeat: int = 3, pattern: Optional[str] = None,
+                   log: Callable[[str], Any] = lambda message: None) -> Dict[str, Any]:
+    """Time each scenario (matching the pattern, if given) for each size, and return the results as a JSON-ready dict.
+
+    Each result is the best time of a single run out of `repeat` measurements, in seconds. A measurement runs the
+    scenario enough times to take at least 0.2 seconds."""
+    results = []
+    for name, setup in get_scenarios().items():
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        for size in sizes:
+            timer = timeit.Timer(setup(size))
+            number, _ = timer.autorange()
+            seconds = min(timer.repeat(repeat, number)) / number
+            results.append({'scenario': name, 'rows': size, 'seconds': seconds})
+            log(f'{name}[{size}]: {seconds:.6f}s')
+    return {'nicetable': nicetable.__version__, 'python': platform.python_version(),
+            'platform': platform.platform(), 'results': results}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Tuple[NiceTable, List[str]]:
+    """Compare results with baseline results of the same scenarios and sizes.
+
+    Returns a table of the comparison, and the keys of the results that are slower than the baseline by more than
+    the threshold (0.1 is 10% slower)"""
+    baseline_seconds = dict((f"{result['scenario']}[{result['rows']}]", result['seconds'])
+                            for result in baseline['results'])
+    out = NiceTable(col_names=['Benchmark', 'Baseline(s)', 'Current(s)', 'Ratio', 'Status'])
+    regressions = []
+    for result in results['results']:
+        key = f"{result['scenario']}[{result['rows']}]"
+        if key not in baseline_seconds:
+            continue
+        ratio = result['seconds'] / baseline_seconds[key] if baseline_seconds[key] else 1.0
+        status = 'ok'
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            status = 'faster'
+        out.append([key, round(baseline_seconds[key], 6), round(result['seconds'], 6), round(ratio, 2), status])
+    return out, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m nicetable.bench', description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=lambda s: list(map(int, s.split(','))), default=SIZES,
+                        help=f'comma-separated numbers of rows (default: {",".join(map(str, SIZES))})')
+    parser.add_argument('--repeat', type=int, default=3, help='measurements per benchmark, the best is kept')
+    parser.add_argument('--filter', dest='pattern', help='run only the scenarios that match this regular expression')
+    parser.add_argument('--list', action='store_true', help='list the scenarios and exit')
+    parser.add_argument('--output', help='save the JSON results to this file, instead of printing them')
+    parser.add_argument('--baseline', help='compare the results with the JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='with --baseline, the slowdown ratio reported as a regression (default: 0.1, 10%%)')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(get_scenarios()))
+        return 0
+    results = run_benchmarks(args.sizes, args.repeat, args.pattern,
+                             log=lambda message: print(message, file=sys.stderr))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparison, regressions = compare(results, baseline, args.threshold)
+        print(comparison, file=sys.stderr)
+        if regressions:
+            print(f'{len(regressions)} regression(s) above {args.threshold:.0%}: {", ".join(regressions)}',
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
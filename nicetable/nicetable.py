@@ -1,5 +1,26 @@
+import array
+import asyncio
+import copy
+import datetime
+import decimal
+import importlib
+import inspect
+import io
+import itertools
+import mmap
 import numbers
-from typing import List, Union, Optional, Callable, Any, Tuple, Dict
+import operator
+import pickle
+import time
+import warnings
+from collections.abc import MutableSequence, Sequence as SequenceABC
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Union, Optional, Callable, Any, Tuple, Dict, Iterator, Iterable, Sequence, AsyncIterator
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it is used to speed up numeric columns when installed
+    np = None
 
 
 def coalesce(*args: Any) -> Any:
@@ -7,13 +28,558 @@ def coalesce(*args: Any) -> Any:
     return next((x for x in args if x is not None), None)
 
 
+def _identity(value: Any) -> Any:
+    return value
+
+
+class CompactColumn(MutableSequence):
+    """A column of ints or floats kept in an `array.array` ('q' / 'd'), with a null bitmap standing in for None.
+
+    A column created without a type picks one by its first non-None value. Once a value that does not fit arrives
+    (for example a string, an int too large for 64 bits, or an int in a detected float column, which would print
+    differently), the column falls back to a plain list, available as `demoted_list`.
+    A column declared as 'float' accepts ints, converting them to floats."""
+
+    TYPECODES = {'int': 'q', 'float': 'd'}
+
+    def __init__(self, col_type: Optional[str] = None, values: Iterable[Any] = ()):
+        if col_type is not None and col_type not in self.TYPECODES:
+            raise ValueError(f'CompactColumn(): got column type "{col_type}", expecting one of {list(self.TYPECODES)}')
+        self.typecode: Optional[str] = self.TYPECODES.get(col_type)  # None until the first non-None value
+        self.declared = col_type is not None
+        self.demoted_list: Optional[List[Any]] = None
+        self._values = array.array(self.typecode or 'q')  # nulls are stored as zeros
+        self._nulls = bytearray()  # bit i is set if value i is None
+        self._null_count = 0
+        self.extend(values)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the values and the null bitmap"""
+        return len(self._values) * self._values.itemsize + len(self._nulls)
+
+    @property
+    def values(self) -> array.array:
+        """The underlying array of a typed column (nulls are stored as zeros)"""
+        return self._values
+
+    @property
+    def has_nulls(self) -> bool:
+        return self._null_count > 0
+
+    def _is_null(self, i: int) -> bool:
+        return self._null_count > 0 and bool(self._nulls[i >> 3] & (1 << (i & 7)))
+
+    def _fits(self, value_types: Iterable[type]) -> bool:
+        """Whether values of these (non-None) types can be stored in the array, deciding the typecode if needed"""
+        value_types = set(value_types)
+        if not value_types:
+            return True
+        if self.typecode is None:
+            if value_types == {int}:
+                self.typecode = 'q'
+            elif value_types == {float}:
+                self.typecode = 'd'
+                self._values = array.array('d', self._values)
+            else:
+                return False
+        if self.typecode == 'q':
+            return value_types == {int}
+        return value_types <= ({float, int} if self.declared else {float})
+
+    def _demote(self) -> None:
+        """Switch to plain list storage, for values that do not fit the array type"""
+        self.demoted_list = list(self)
+        self.typecode = None
+        self._values = array.array('q')
+        self._nulls = bytearray()
+        self._null_count = 0
+
+    def append(self, value: Any) -> None:
+        if self.demoted_list is not None:
+            self.demoted_list.append(value)
+            return
+        self.extend((value,))
+
+    def extend(self, values: Iterable[Any]) -> None:
+        if self.demoted_list is not None:
+            self.demoted_list.extend(values)
+            return
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        value_types = set(map(type, values))
+        has_nulls = type(None) in value_types
+        value_types.discard(type(None))
+        if not self._fits(value_types):
+            self._demote()
+            self.demoted_list.extend(values)
+            return
+        try:
+            new_values = array.array(self.typecode or 'q', (0 if v is None else v for v in values) if has_nulls
+                                     else values)
+        except OverflowError:
+            self._demote()
+            self.demoted_list.extend(values)
+            return
+
+        start = len(self._values)
+        self._values.extend(new_values)
+        self._nulls.extend(bytes((len(self._values) + 7) // 8 - len(self._nulls)))
+        if has_nulls:
+            for i, v in enumerate(values, start):
+                if v is None:
+                    self._nulls[i >> 3] |= 1 << (i & 7)
+                    self._null_count += 1
+
+    def numeric_digits(self, start: int = 0, end: Optional[int] = None) -> Tuple[int, int]:
+        """Max number of digits left and right to the decimal point of str(value), for the values in [start, end)"""
+        end = len(self._values) if end is None else min(end, len(self._values))
+        if self.demoted_list is not None or self.typecode is None or start >= end:
+            raise ValueError('CompactColumn.numeric_digits(): expecting a typed column with values from start')
+        if self.typecode == 'q':
+            if self._null_count == len(self._values):
+                return 0, 0
+            values = self._values[start:end]  # nulls are zeros, which never have more digits than other values
+            return max(len(str(min(values))), len(str(max(values)))), 0
+        digits_left, digits_right = 0, 0
+        for i in range(start, end):
+            if self._is_null(i):
+                continue
+            as_string = repr(self._values[i])
+            dot_pos = as_string.find('.')
+            if dot_pos == -1:
+                digits_left = max(digits_left, len(as_string))
+            else:
+                digits_left = max(digits_left, dot_pos)
+                digits_right = max(digits_right, len(as_string) - dot_pos - 1)
+        return digits_left, digits_right
+
+    def __len__(self) -> int:
+        return len(self.demoted_list) if self.demoted_list is not None else len(self._values)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.demoted_list is not None:
+            return iter(self.demoted_list)
+        if self._null_count == 0:
+            return iter(self._values)
+        return (None if self._is_null(i) else v for i, v in enumerate(self._values))
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if self.demoted_list is not None:
+            return self.demoted_list[i]
+        if isinstance(i, slice):
+            values = self._values[i].tolist()
+            if self._null_count:
+                for n, pos in enumerate(range(*i.indices(len(self._values)))):
+                    if self._is_null(pos):
+                        values[n] = None
+            return values
+        if i < 0:
+            i += len(self._values)
+        value = self._values[i]  # raises IndexError on bad input
+        return None if self._is_null(i) else value
+
+    def __setitem__(self, i: Union[int, slice], value: Any) -> None:
+        if self.demoted_list is not None:
+            self.demoted_list[i] = value
+            return
+        if isinstance(i, int) and self._set_in_place(i, value):
+            return
+        values = list(self)  # a slice, or a value that does not fit
+        values[i] = value
+        self._rebuild(values)
+
+    def _set_in_place(self, i: int, value: Any) -> bool:
+        """Set a single value in the array and the null bitmap, returns False if it does not fit the array type"""
+        if i < 0:
+            i += len(self._values)
+        if not 0 <= i < len(self._values):
+            raise IndexError('CompactColumn assignment index out of range')
+        if value is not None:
+            if not self._fits((type(value),)):
+                return False
+            try:
+                self._values[i] = value
+            except OverflowError:
+                return False
+        else:
+            self._values[i] = 0
+        was_null = self._is_null(i)
+        if value is None and not was_null:
+            self._nulls[i >> 3] |= 1 << (i & 7)
+            self._null_count += 1
+        elif value is not None and was_null:
+            self._nulls[i >> 3] &= ~(1 << (i & 7))
+            self._null_count -= 1
+        return True
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        if self.demoted_list is not None:
+            del self.demoted_list[i]
+            return
+        if self._null_count == 0:  # no null bits to shift
+            del self._values[i]
+            del self._nulls[(len(self._values) + 7) // 8:]
+            return
+        values = list(self)
+        del values[i]
+        self._rebuild(values)
+
+    def insert(self, i: int, value: Any) -> None:
+        if self.demoted_list is not None:
+            self.demoted_list.insert(i, value)
+            return
+        if self._null_count == 0 and value is not None and self._fits((type(value),)):
+            try:
+                self._values.insert(i, value)
+            except OverflowError:
+                pass
+            else:
+                self._nulls.extend(bytes((len(self._values) + 7) // 8 - len(self._nulls)))
+                return
+        values = list(self)
+        values.insert(i, value)
+        self._rebuild(values)
+
+    def _rebuild(self, values: List[Any]) -> None:
+        if self.demoted_list is not None:
+            self.demoted_list[:] = values
+            return
+        self._values = array.array(self.typecode or 'q')
+        self._nulls = bytearray()
+        self._null_count = 0
+        self.extend(values)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (CompactColumn, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'CompactColumn({self.typecode!r}, {list(self)!r})'
+
+
+class RingColumn(MutableSequence):
+    """A column with a fixed capacity, used by tables with max_rows.
+
+    Once the column is full, appending a value overwrites the oldest value, so nothing is shifted in memory."""
+
+    def __init__(self, capacity: int, values: Iterable[Any] = ()):
+        self.capacity = capacity
+        self._values: List[Any] = []
+        self._head = 0  # position of the oldest value in _values, moves only when the column is full
+        self.extend(values)
+
+    def append(self, value: Any) -> None:
+        if len(self._values) < self.capacity:
+            self._values.append(value)
+        else:
+            self._values[self._head] = value
+            self._head = (self._head + 1) % self.capacity
+
+    def extend(self, values: Iterable[Any]) -> None:
+        values = values if isinstance(values, list) else list(values)
+        if len(values) >= self.capacity:
+            self._values = values[-self.capacity:]
+            self._head = 0
+            return
+        room = self.capacity - len(self._values)
+        if room > 0:
+            self._values.extend(values[:room])
+            values = values[room:]
+        while values:  # overwriting the oldest values, wrapping around at the end of _values
+            n = min(len(values), self.capacity - self._head)
+            self._values[self._head:self._head + n] = values[:n]
+            self._head = (self._head + n) % self.capacity
+            values = values[n:]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[Any]:
+        return itertools.chain(itertools.islice(self._values, self._head, None),
+                               itertools.islice(self._values, self._head))
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return list(self)[i]
+            older_count = len(self._values) - self._head  # values in _values[head:], the older part
+            out = self._values[self._head + start:self._head + min(stop, older_count)] if start < older_count else []
+            if stop > older_count:
+                out += self._values[max(start - older_count, 0):stop - older_count]
+            return out
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('RingColumn index out of range')
+        return self._values[(self._head + i) % self.capacity]
+
+    def __setitem__(self, i: Union[int, slice], value: Any) -> None:
+        if isinstance(i, slice):
+            values = list(self)
+            values[i] = value
+            self._rebuild(values)
+            return
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('RingColumn assignment index out of range')
+        self._values[(self._head + i) % self.capacity] = value
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        values = list(self)
+        del values[i]
+        self._rebuild(values)
+
+    def insert(self, i: int, value: Any) -> None:
+        values = list(self)
+        values.insert(i, value)
+        self._rebuild(values)
+
+    def _rebuild(self, values: List[Any]) -> None:
+        self._values = []
+        self._head = 0
+        self.extend(values)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (RingColumn, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'RingColumn({self.capacity}, {list(self)!r})'
+
+
+class ColumnView(SequenceABC):
+    """A read-only view of some of the rows of a column, given by their positions - a range (for example,
+    see head()) or an array of row positions, in any order (see sorted_by() and where())."""
+
+    def __init__(self, column: Sequence[Any], rows: Union[range, Sequence[int]]):
+        if type(column) is ColumnView:  # a view of a view references the underlying column directly
+            if isinstance(rows, range):
+                rows = column.rows[rows.start:rows.stop:rows.step]
+            else:
+                rows = array.array('q', map(column.rows.__getitem__, rows))
+            column = column.column
+        self.column = column
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self.column.__getitem__, self.rows)
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            rows = self.rows[i]
+            if isinstance(rows, range) and rows.step == 1:
+                return self.column[rows.start:rows.stop]
+            return list(map(self.column.__getitem__, rows))
+        return self.column[self.rows[i]]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ColumnView, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'ColumnView({list(self)!r})'
+
+
+class _WrappedLines(list):
+    """The lines of a cell that was wrapped to max_len - a cell formatted in the width pass is counted once it is
+    output (see NiceTable.render(stats=True))"""
+
+
+class _TruncatedLines(list):
+    """The lines of a cell that was truncated to max_len, see _WrappedLines"""
+
+
+class _ColumnPlan:
+    """The effective formatting of a column (or of its header), resolved once from the table and column settings.
+
+    Formatting a cell is then a straight sequence of calls - func(), to_str_list() and pad().
+    The number format and the padding depend on the data, so they are updated on every render
+    by set_digits() and set_width()."""
+    __slots__ = ('func', 'compact_number', 'none_string', 'to_str', 'split_lines', 'newline_replace', 'max_len',
+                 'fit', 'adjust', 'min_len', 'is_numeric', 'number_format', 'number_len', 'pad',
+                 'formatters', 'type_formatters', 'format_number', 'wrapped_cells', 'truncated_cells')
+
+    # built-in formatting by type: True for numbers, which are aligned by the decimal point, False for text
+    BUILTIN_TYPES = {int: True, float: True, decimal.Decimal: True, bool: True,
+                     str: False, datetime.datetime: False, datetime.date: False, bytes: False, type(None): False}
+
+    def __init__(self, func: Optional[Callable[[Any], Any]], adjust: str, to_str: Callable[[Any], str],
+                 split_lines: bool, none_string: str, newline_replace: Optional[str], max_len: int,
+                 too_long_policy: str, min_len: int, formatters: Dict[type, Callable[[Any], str]]):
+        self.func = func
+        self.adjust = adjust
+        self.compact_number = adjust.startswith('strict') or adjust == 'compact'
+        self.to_str = to_str  # str(), including the escaping of sep_vertical
+        self.split_lines = split_lines  # False if newlines are kept inside quoted compact values
+        self.none_string = none_string
+        self.newline_replace = newline_replace
+        self.max_len = max_len
+        self.fit = self._truncate if too_long_policy == 'truncate' else self._wrap
+        self.min_len = min_len
+        self.wrapped_cells = 0  # counters of cells that did not fit max_len, see NiceTable.render(stats=True)
+        self.truncated_cells = 0
+        self.formatters = formatters  # registered by the user, see NiceTable.register_formatter()
+        self.format_number = self._format_number  # a single bound method, so is_number() can compare it
+        self.type_formatters: Dict[type, Callable[[Any], str]] = {}  # the formatter of each type, resolved on first use
+        self.set_digits(False, 0, 0)
+        self.set_width(min_len)
+
+    def set_digits(self, is_numeric: bool, digits_left: int, digits_right: int) -> None:
+        """Set the alignment of numbers - fixed number of fractional digits and left-padding with spaces"""
+        self.is_numeric = is_numeric
+        self.number_format = f'.{digits_right}f'
+        self.number_len = digits_left + digits_right + 1
+
+    def set_width(self, width: int) -> None:
+        """Set the cell adjustment for the column width (should be called after set_digits())"""
+        col_len = max(width, self.min_len)
+        min_len = self.min_len
+        adjust = self.adjust
+        if adjust in ('right', 'strict_right') or (adjust == 'auto' and self.is_numeric):
+            self.pad = lambda str_list: [s.rjust(col_len) for s in str_list]
+        elif adjust in ('center', 'strict_center'):
+            self.pad = lambda str_list: [s.center(col_len) for s in str_list]
+        elif adjust in ('left', 'strict_left', 'auto'):
+            self.pad = lambda str_list: [s.ljust(col_len) for s in str_list]
+        else:  # compact
+            self.pad = lambda str_list: [s.strip().ljust(min_len) for s in str_list]
+
+    def resolve_formatter(self, value_type: type) -> Callable[[Any], str]:
+        """Find the formatter of a value type, by the type and its base classes - a formatter registered by the user,
+        or else the built-in formatting of numbers (including the types registered with numbers.Number) and text"""
+        to_str = self.to_str
+        user_formatter = next((self.formatters[base_type] for base_type in value_type.__mro__
+                               if base_type in self.formatters), None) if self.formatters else None
+        is_number = self.BUILTIN_TYPES.get(value_type)
+        if is_number is None:
+            is_number = next((self.BUILTIN_TYPES[base_type] for base_type in value_type.__mro__
+                              if base_type in self.BUILTIN_TYPES), None)
+        if value_type is type(None):
+            formatter = self._format_none
+        elif user_formatter is not None:
+            def formatter(value: Any) -> str:
+                return to_str(user_formatter(value))
+        elif is_number or (is_number is None and issubclass(value_type, numbers.Number)):
+            formatter = self.format_number
+        else:
+            formatter = to_str
+        self.type_formatters[value_type] = formatter
+        return formatter
+
+    def is_number(self, value: Any) -> bool:
+        """Whether the value is formatted as a number (aligned by the decimal point)"""
+        value_type = type(value)
+        return (self.type_formatters.get(value_type) or self.resolve_formatter(value_type)) is self.format_number
+
+    def _format_number(self, value: Any) -> str:
+        if self.compact_number:
+            return str(value)
+        return format(value, self.number_format).rjust(self.number_len)
+
+    def _format_none(self, _: None) -> str:
+        return self.none_string
+
+    def to_str_list(self, processed_value: Any) -> List[str]:
+        """Convert a single value, after applying the column function, to a list of unadjusted strings"""
+        value_type = type(processed_value)
+        single_line_str = (self.type_formatters.get(value_type) or self.resolve_formatter(value_type))(processed_value)
+
+        if self.newline_replace is not None:
+            str_list = [single_line_str.replace('\n', self.newline_replace)]
+        elif self.split_lines:
+            str_list = single_line_str.split('\n')
+        else:
+            str_list = [single_line_str]
+        return self.fit(str_list)
+
+    def cell_str_list(self, value: Any) -> List[str]:
+        """Convert a single value to a list of adjusted strings"""
+        return self.pad(self.to_str_list(value if self.func is None else self.func(value)))
+
+    def compact_strs(self, processed_values: Sequence[Any]) -> Optional[List[str]]:
+        """Vectorized pad(to_str_list()) of a column with 'compact' adjust, returning a single string per value,
+        after applying the column function.
+
+        Returns None if some of the values are multi-line, which should be handled by to_str_list()."""
+        values = processed_values
+        none_string = self.none_string
+        if self.to_str is str and not self.formatters:  # all the built-in formatters of a compact column are str()
+            strs = list(none_string if value is None else str(value) for value in values)
+        else:
+            type_formatters = self.type_formatters
+            resolve_formatter = self.resolve_formatter
+            strs = list((type_formatters.get(type(value)) or resolve_formatter(type(value)))(value)
+                        for value in values)
+        if '\n' in ''.join(strs):
+            if self.newline_replace is not None:
+                strs = list(s.replace('\n', self.newline_replace) for s in strs)
+            elif self.split_lines:
+                return None
+        max_len = self.max_len
+        if max(map(len, strs), default=0) > max_len:
+            if self.fit == self._wrap:
+                return None
+            self.truncated_cells += sum(len(s) > max_len for s in strs)
+            strs = list(s[:max_len] for s in strs)
+        strs = list(map(str.strip, strs))
+        if self.min_len > 0:
+            min_len = self.min_len
+            strs = list(s.ljust(min_len) for s in strs)
+        return strs
+
+    def _wrap(self, str_list: List[str]) -> List[str]:
+        max_len = self.max_len
+        if len(str_list) == 1 and len(str_list[0]) <= max_len:
+            return str_list
+        final_str_list = []
+        for s in str_list:
+            if len(s) <= max_len:
+                final_str_list.append(s)
+            else:
+                final_str_list += [s[i:i+max_len] for i in range(0, len(s), max_len)]
+        if len(final_str_list) > len(str_list):
+            self.wrapped_cells += 1
+            return _WrappedLines(final_str_list)
+        return final_str_list
+
+    def _truncate(self, str_list: List[str]) -> List[str]:
+        max_len = self.max_len
+        if len(str_list) == 1 and len(str_list[0]) <= max_len:
+            return str_list
+        if all(len(s) <= max_len for s in str_list):
+            return str_list
+        self.truncated_cells += 1
+        return _TruncatedLines(s[:max_len] for s in str_list)
+
+    def count_fitted(self, str_list: List[str]) -> None:
+        """Count a cell that was formatted (and wrapped or truncated) in the width pass, as it is output"""
+        if type(str_list) is _WrappedLines:
+            self.wrapped_cells += 1
+        elif type(str_list) is _TruncatedLines:
+            self.truncated_cells += 1
+
+
 class NiceTable:
     """NiceTable let you accumulate records and get them back in a printable tabular format
 
     GENERAL
-        TODO check integration with pandas df (itertuples) / SQL result sets
         TODO make a class for layout functions with __category__ , __url__ in the constructor?
-        TODO column manipulations: add / rename / remove column (data);  hide / show column (print); sort (print)
+        TODO column manipulations: add / rename / remove column (data)
     FORMATTING
         TODO custom value quoting (wrapper) like ""
         TODO (idea) ASCII color for headers
@@ -25,8 +591,16 @@ class NiceTable:
 
     HEADER_ADJUST_OPTIONS = ['left', 'center', 'right', 'compact']
     COLUMN_ADJUST_OPTIONS = ['auto'] + HEADER_ADJUST_OPTIONS + ['strict_left', 'strict_center', 'strict_right']
-    VALUE_ESCAPING_OPTIONS = ['remove', 'replace', 'prefix', 'ignore']
+    VALUE_ESCAPING_OPTIONS = ['remove', 'replace', 'prefix', 'ignore', 'quote']
     VALUE_TOO_LONG_POLICY = ['truncate', 'wrap']
+    COLUMN_STORAGE_OPTIONS = ['int', 'float', 'list']
+    NUMPY_MIN_ROWS = 1000  # below that, the numpy code path for int columns is not worth its overhead
+    COMPACT_CHUNK_ROWS = 10000  # rows formatted together when rendering a table without padding
+    CELL_CACHE_ROWS = 10000  # rows formatted together by the width pass, the first of them are kept for the output
+    COMPRESSION_OPTIONS = ['gzip', 'bz2', 'lzma']
+    FORMATTERS: Dict[type, Callable[[Any], str]] = {}  # see register_formatter()
+    _render_stats_hook = None  # see set_render_stats_hook()
+    BUDGET_FOOTER = '... {rows_left_out} more rows not shown ({budget})'  # see render(max_rows=..., max_seconds=...)
 
     FORMATTING_SETTINGS = [  # Name, Type, Default, Description
         ['header', 'bool', True, 'whether the table header will be printed'],
@@ -53,6 +627,7 @@ class NiceTable:
             'a string to replace or prefix `sep_vertical`, based on `value_escape_type`'],
         ['value_func', 'function', None, 'a function to pre-process the value before any other settings apply']
     ]
+    _SETTING_DEFAULTS = dict((setting[0], setting[2]) for setting in FORMATTING_SETTINGS)
 
     # noinspection SpellCheckingInspection
     SAMPLE_JSON = '[' + \
@@ -64,8 +639,45 @@ class NiceTable:
     @classmethod
     def builtin_layouts(cls) -> List[List[str]]:
         """Generate a list of builtin layouts and their description by from the class functions"""
-        prefix = '_layout_as_'
-        return list([x[len(prefix):], getattr(cls, x).__doc__] for x in dir(cls) if x.startswith(prefix))
+        return list([layout, func.__doc__] for layout, func in cls._get_layouts().items())
+
+    @classmethod
+    def _get_layouts(cls) -> Dict[str, Callable[['NiceTable'], None]]:
+        """The "_layout_as_*" functions by layout name, collected once per class (including subclasses)"""
+        layouts = cls.__dict__.get('_layouts')
+        if layouts is None:
+            prefix = '_layout_as_'
+            layouts = dict((x[len(prefix):], getattr(cls, x)) for x in dir(cls) if x.startswith(prefix))
+            cls._layouts = layouts
+        return layouts
+
+    @classmethod
+    def template(cls, layout: Optional[str] = None, **settings: Any) -> 'TableTemplate':
+        """A factory of tables that share the same settings - the settings are validated once, and its new()
+        skips the per-table setup of the settings, which adds up when creating many small tables.
+        The settings are any of the constructor parameters, except for data and col_names."""
+        return TableTemplate(cls, layout, settings)
+
+    @classmethod
+    def register_formatter(cls, value_type: type, func: Callable[[Any], str]) -> None:
+        """Format the values of a type (and of its subclasses) as the string returned by func, for all the tables of
+        this class (and of its subclasses). Such values are printed as text, even if they are numbers."""
+        if not isinstance(value_type, type):
+            raise TypeError(f'NiceTable.register_formatter(): value_type parameter should be a type, '
+                            f'got {type(value_type)}')
+        if not hasattr(func, '__call__'):
+            raise TypeError(f'NiceTable.register_formatter(): func parameter should be a function, got {type(func)}')
+        formatters = dict(cls.FORMATTERS)  # a new dict, so the render plans of existing tables are rebuilt
+        formatters[value_type] = func
+        cls.FORMATTERS = formatters
+
+    @classmethod
+    def set_render_stats_hook(cls, hook: Optional[Callable[[Dict[str, Any]], Any]]) -> None:
+        """Collect the statistics of every render of the tables of this class, including str(), and pass them to
+        the hook - for example, to export them to a metrics system (see render()). None removes the hook."""
+        if hook is not None and not hasattr(hook, '__call__'):
+            raise TypeError(f'NiceTable.set_render_stats_hook(): expecting a function or None, got {type(hook)}')
+        cls._render_stats_hook = None if hook is None else staticmethod(hook)
 
     def __init__(self,
                  data: Optional[Union[List[List[Any]], List[Dict[str, Any]], List[Tuple]]] = None,
@@ -90,7 +702,10 @@ class NiceTable:
                  value_none_string: Optional[str] = None,
                  value_escape_type: Optional[str] = None,
                  value_escape_char: Optional[str] = None,
-                 value_func: Optional[Callable[[Any], Any]] = None):
+                 value_func: Optional[Callable[[Any], Any]] = None,
+                 compact_storage: bool = False,
+                 max_rows: Optional[int] = None,
+                 incremental_stats: bool = False):
         self._init_layout_instance_vars()
         # setting a layout may override some of the default layout options
         self.layout = coalesce(layout, 'default')
@@ -115,7 +730,12 @@ class NiceTable:
         self.value_escape_type = coalesce(value_escape_type, self.value_escape_type)
         self.value_escape_char = coalesce(value_escape_char, self.value_escape_char)
         self.value_func = coalesce(value_func, self.value_func)
+        self._init_data_instance_vars(data, col_names, compact_storage, max_rows, incremental_stats)
 
+    def _init_data_instance_vars(self, data: Optional[Union[List[List[Any]], List[Dict[str, Any]], List[Tuple]]],
+                                 col_names: Optional[List[str]], compact_storage: bool, max_rows: Optional[int],
+                                 incremental_stats: bool):
+        """ creates the instance variables of the columns and populates them with data, once the settings are set """
         self.total_lines = 0
         if not data and not col_names:
             raise ValueError('NiceTable(): provide at least one of the following parameters: data, col_names')
@@ -127,24 +747,45 @@ class NiceTable:
 
         # init col-level instance vars based on col_names
         self.total_cols = len(col_names)
-        self.columns: List[List[Any]] = list([] for _ in range(self.total_cols))
+        # with compact_storage, int / float columns are auto-detected and stored as arrays (see CompactColumn)
+        self.compact_storage = compact_storage
+        # with max_rows, the oldest rows are evicted - once the table is full, its columns become RingColumns
+        if max_rows is not None and max_rows < 1:
+            raise ValueError(f'NiceTable(): max_rows should be a positive number, got {max_rows}')
+        self.max_rows = max_rows
+        # with incremental_stats, a render only scans the rows appended since the previous render. Cells that are
+        # edited in place (through the columns lists) are not rescanned, so it is off by default
+        self.incremental_stats = incremental_stats
+        self.columns: List[List[Any]] = list(CompactColumn() if compact_storage else []
+                                             for _ in range(self.total_cols))
         self.col_names = list(self.value_none_string if name is None else name for name in col_names)
-        self.col_adjust = list(None for _ in range(self.total_cols))
-        self.col_max_len = list(None for _ in range(self.total_cols))
-        self.col_newline_replace = list(None for _ in range(self.total_cols))
-        self.col_none_string = list(None for _ in range(self.total_cols))
-        self.col_funcs: List[Optional[Callable[[Any], Any]]] = list(None for _ in range(self.total_cols))
+        self.col_adjust = [None] * self.total_cols
+        self.col_max_len = [None] * self.total_cols
+        self.col_newline_replace = [None] * self.total_cols
+        self.col_none_string = [None] * self.total_cols
+        self.col_funcs: List[Optional[Callable[[Any], Any]]] = [None] * self.total_cols
+        self.col_hidden = [False] * self.total_cols
+        self._visible_cols = list(range(self.total_cols))  # the positions of the columns that are not hidden
+        # render-scoped, per column: (first row, its unadjusted strings, the processed values of a function column)
+        self._cell_cache: Optional[List[Optional[Tuple[int, List[List[str]], Optional[List[Any]]]]]] = None
+        self.last_render_stats: Optional[Dict[str, Any]] = None  # see render(stats=True)
+        self._col_widths_pending = False  # whether a compact render skipped computing the column widths
+        self._array_columns = False  # whether some columns are numpy arrays, which must become lists to grow
+        self._read_only = False  # views (see tail() / select()) reference the columns of another table
+        self._reset_columns_stats()
+        self._plans_signature: Optional[Tuple] = None  # see _get_plans()
+        self._plans: List[_ColumnPlan] = []
+        self._header_plans: List[_ColumnPlan] = []
+        self._header_lens_cache: Optional[Tuple[Tuple, List[int]]] = None  # see _get_header_lens()
+        self._frame_cache: Optional[Tuple[Tuple, List[str], str]] = None  # see _get_header_and_sepline()
 
         # Populating with initial data, if provided
         if data:
-            for row in data:
-                self.append(row)
+            self.extend(data)
 
     def _init_layout_instance_vars(self):
         """ creates all instance variables and and initializes them to a default """
-        def get_default(var_name: str) -> str:
-            """picking defaults from FORMATTING_SETTINGS so code and documentation are in-sync"""
-            return next(setting[2] for setting in self.FORMATTING_SETTINGS if setting[0] == var_name)
+        get_default = self._SETTING_DEFAULTS.get  # defaults from FORMATTING_SETTINGS, so code and docs are in-sync
 
         self.header = get_default('header')
         self.header_sepline = get_default('header_sepline')
@@ -262,12 +903,11 @@ class NiceTable:
 
     @layout.setter
     def layout(self, layout: str) -> None:
-        valid_layouts = list(x[0] for x in self.builtin_layouts())
-        if layout not in valid_layouts:
-            raise ValueError(f'Unknown table layout "{layout}", should be one of {valid_layouts}')
+        layouts = self._get_layouts()
+        if layout not in layouts:
+            raise ValueError(f'Unknown table layout "{layout}", should be one of {list(layouts)}')
 
-        prefix = '_layout_as_'
-        getattr(self, prefix + layout)()  # calls the proper "_layout_as_*" function
+        layouts[layout](self)  # calls the proper "_layout_as_*" function
         self._layout = layout
 
     def _layout_as_default(self) -> None:
@@ -319,11 +959,48 @@ class NiceTable:
             values = []
         else:
             raise TypeError(f'NiceTable.append(): expecting a list / dict / tuple / None, got {type(values)}')
+        self._check_writable('append')
 
+        if self._array_columns:
+            self._array_columns_to_lists()
         self.total_lines += 1
         append_func(values)
+        if self.compact_storage:
+            self._unwrap_demoted_columns()
+        if self.max_rows is not None:
+            self._evict_rows()
         return self
 
+    def _check_writable(self, func_name: str, class_name: str = 'NiceTable') -> None:
+        """Reject changes to a view before any of its state is changed - its columns belong to another table"""
+        if self._read_only:
+            raise TypeError(f'{class_name}.{func_name}(): the table is a read-only view of another table '
+                            '(see tail() / select()), change the original table instead')
+
+    def _array_columns_to_lists(self) -> None:
+        """Convert numpy array columns (referenced as-is, see from_dataframe()) to lists, so they can grow"""
+        for i, column in enumerate(self.columns):
+            if np is not None and isinstance(column, np.ndarray):
+                self.columns[i] = list(self._as_python_values(column))
+        self._array_columns = False
+
+    def _evict_rows(self) -> None:
+        """Drop the oldest rows beyond max_rows, the columns evict rows on their own once they are RingColumns"""
+        if self.total_lines <= self.max_rows:
+            return
+        for i, column in enumerate(self.columns):
+            if type(column) is not RingColumn:
+                self.columns[i] = RingColumn(self.max_rows, self._as_python_values(column[-self.max_rows:]))
+        self._array_columns = False
+        self.total_lines = self.max_rows
+        self._reset_columns_stats()  # the evicted rows may have been the widest, so all rows are scanned again
+
+    def _unwrap_demoted_columns(self) -> None:
+        """Replace compact columns that fell back to list storage with their list"""
+        for i, column in enumerate(self.columns):
+            if type(column) is CompactColumn and column.demoted_list is not None:
+                self.columns[i] = column.demoted_list
+
     def _append_unnamed_collection(self, values: Union[List[Any], Tuple]) -> None:
         """Append a row, using None if not enough elements"""
         if len(values) > self.total_cols:
@@ -345,63 +1022,1178 @@ class NiceTable:
             else:
                 self.columns[i].append(None)
 
+    def extend(self, rows: Iterable[Optional[Union[List[Any], Dict[str, Any], Tuple]]],
+               trusted: bool = False) -> 'NiceTable':
+        """Append multiple lines at once, same input as append().
+
+        A batch of lists/tuples (or a batch of dicts) is validated once and transposed into the columns in bulk.
+        With `trusted=True`, rows are assumed to be lists/tuples and their types are not checked."""
+        self._check_writable('extend')
+        if not isinstance(rows, list):
+            rows = list(rows)
+        if not rows:
+            return self
+
+        if self._array_columns:
+            self._array_columns_to_lists()
+        row_types = {list} if trusted else set(map(type, rows))
+        if all(issubclass(row_type, (list, tuple)) for row_type in row_types):
+            self._extend_unnamed_collections(rows)
+        elif all(issubclass(row_type, dict) for row_type in row_types):
+            self._extend_dicts(rows)
+        else:  # a mixed batch (or with None / bad types) - appending one by one
+            for row in rows:
+                self.append(row)
+            return self
+
+        self.total_lines += len(rows)
+        if self.compact_storage:
+            self._unwrap_demoted_columns()
+        if self.max_rows is not None:
+            self._evict_rows()
+        return self
+
+    def _extend_unnamed_collections(self, rows: List[Union[List[Any], Tuple]]) -> None:
+        """Append rows of lists/tuples column by column, using None if not enough elements"""
+        row_lengths = set(map(len, rows))
+        max_len = max(row_lengths)
+        if max_len > self.total_cols:
+            raise ValueError(f'NiceTable.extend(): got a list of {max_len} elements, expecting up to {self.total_cols}')
+        if len(row_lengths) > 1:  # padding short rows, so all rows can be transposed the same way
+            rows = list(row if len(row) == max_len else list(row) + [None] * (max_len - len(row)) for row in rows)
+        for i, column in enumerate(self.columns):
+            if i < max_len:
+                column.extend(map(operator.itemgetter(i), rows))
+            else:
+                column.extend(itertools.repeat(None, len(rows)))
+
+    def _extend_dicts(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows of dicts, column by column (use None for columns not in a dict)"""
+        for column, col_name in zip(self.columns, self.col_names):
+            column.extend(row.get(col_name) for row in rows)
+
+    def append_columns(self, columns: Dict[str, Sequence[Any]]) -> 'NiceTable':
+        """Append lines given column-wise as {column name: sequence of values}, missing columns are set to None.
+
+        If the table has no lines yet, a list (or a numpy array) is used as the column storage as-is, without copying
+        it. Appending lines later on converts numpy arrays to lists. With compact_storage, the values are always copied
+        into the table's columns (see CompactColumn)."""
+        self._check_writable('append_columns')
+        unknown_names = list(name for name in columns if name not in self.col_names)
+        if unknown_names:
+            raise ValueError(f'NiceTable.append_columns(): got unknown column names {unknown_names}, '
+                             f'expecting names from {self.col_names}')
+        lengths = set(len(values) for values in columns.values())
+        if len(lengths) > 1:
+            raise ValueError(f'NiceTable.append_columns(): all columns should have the same length, '
+                             f'got lengths {sorted(lengths)}')
+        new_lines = lengths.pop() if lengths else 0
+
+        if self._array_columns and new_lines:
+            self._array_columns_to_lists()
+        adopted_ids = set()
+        for i, col_name in enumerate(self.col_names):
+            values = columns.get(col_name)
+            is_array = np is not None and isinstance(values, np.ndarray)
+            if values is None:
+                self.columns[i].extend(itertools.repeat(None, new_lines))
+            elif self.compact_storage:
+                self.columns[i].extend(values.tolist() if is_array else values)  # numpy scalars would not fit
+            elif self.total_lines == 0 and (type(values) is list or is_array) and id(values) not in adopted_ids:
+                self.columns[i] = values  # zero-copy: the table now owns the caller's list / array
+                adopted_ids.add(id(values))
+                self._array_columns = self._array_columns or is_array
+            else:
+                self.columns[i].extend(values)
+        self.total_lines += new_lines
+        if self.compact_storage:
+            self._unwrap_demoted_columns()
+        if self.max_rows is not None:
+            self._evict_rows()
+        return self
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence[Any]], layout: Optional[str] = None,
+                     **kwargs: Any) -> 'NiceTable':
+        """Create a table from {column name: sequence of values}, other parameters are passed to the constructor.
+
+        The column lists are used as-is, without copying them (unless compact_storage is set)."""
+        return cls(layout=layout, col_names=list(columns.keys()), **kwargs).append_columns(columns)
+
+    @classmethod
+    def from_cursor(cls, cursor: Any, batch_size: int = 10000, layout: Optional[str] = None,
+                    **kwargs: Any) -> 'NiceTable':
+        """Create a table from a DB-API cursor after execute(), other parameters are passed to the constructor.
+
+        Column names are taken from `cursor.description`, and rows (sequences or dicts) are fetched with fetchmany()
+        in batches straight into the columns, so the whole result set is never held as a list of row tuples.
+        Combine with iter_lines() to also write the output line by line."""
+        if cursor.description is None:
+            raise ValueError('NiceTable.from_cursor(): the cursor has no result set (cursor.description is None)')
+        if batch_size < 1:
+            raise ValueError(f'NiceTable.from_cursor(): batch_size should be a positive number, got {batch_size}')
+        out = cls(layout=layout, col_names=list(column[0] for column in cursor.description), **kwargs)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            # DB-API rows are sequences with a value per column, unless the cursor returns dicts (like DictCursor)
+            out.extend(rows, trusted=not isinstance(rows[0], dict))
+        return out
+
+    @classmethod
+    def from_dataframe(cls, df: Any, layout: Optional[str] = None, index: bool = False,
+                       **kwargs: Any) -> 'NiceTable':
+        """Create a table from a pandas DataFrame, other parameters are passed to the constructor.
+
+        Each column references the DataFrame data as a numpy array (for numeric columns, without copying it),
+        so no per-row tuples are created. Numeric dtypes also let the width pass skip the per-value type checks.
+        With `index=True`, the DataFrame index is added as the first column."""
+        col_names = list(df.columns)
+        arrays = list(cls._series_to_array(series) for _, series in df.items())
+        if index:
+            col_names.insert(0, coalesce(df.index.name, 'index'))
+            arrays.insert(0, cls._series_to_array(df.index))
+        out = cls(layout=layout, col_names=col_names, **kwargs)
+        out.columns = arrays
+        out.total_lines = len(df)
+        out._array_columns = True
+        if out.max_rows is not None:
+            out._evict_rows()
+        return out
+
+    @staticmethod
+    def _series_to_array(series: Any) -> Any:
+        """A numpy array of a pandas Series / Index values, without copying them for numeric and object dtypes"""
+        if isinstance(series.dtype, np.dtype):
+            if series.dtype.kind in 'iufcO':
+                return series.to_numpy()
+            return series.to_numpy(dtype=object)  # Python bools, and Timestamps that print as in the rows of a table
+        return series.to_numpy(dtype=object, na_value=None)  # extension dtypes, missing values become None
+
     def __str__(self):
-        out = []
-        self._compute_columns_attributes()
-        sep_line = self._generate_sepline()
+        if self._render_stats_hook is not None:
+            return self._render_with_stats(None, self._render_serially)
+        return '\n'.join(self.iter_lines()) + '\n'
+
+    def iter_lines(self) -> Iterator[str]:
+        """Generate the printable table one output line at a time (without a trailing newline).
+
+        Column widths are computed once upfront, after that lines are yielded as they are rendered,
+        so the memory footprint depends on the width of a row, not on the number of rows.
+        If all the cells are compact (as in the csv, tsv and grep layouts), no padding is needed, so rows are
+        rendered directly, without computing column widths - unless a multi-line cell shows up."""
+        compact = self._prepare_render()
+        try:
+            yield from self._iter_rows_lines(compact, 0, self.total_lines)
+        finally:
+            self._cell_cache = None  # the cell cache is render-scoped
+
+    def render_page(self, offset: int, limit: int) -> str:
+        """Render the rows in [offset, offset + limit) as a printable table, with the column widths of the entire table.
+
+        The widths are of all the rows, so all pages line up. They are computed by the first page, and kept for the
+        next pages (and iter_pages()) until rows are added or removed or a formatting setting changes, so after the
+        first page the cost of rendering a page depends on the page size, not on the number of rows.
+        Cells that are edited in place do not change the widths of the next pages, until the table is rendered in
+        full (str() / iter_lines())."""
+        if offset < 0 or limit < 0:
+            raise ValueError(f'NiceTable.render_page(): offset and limit should not be negative, got {offset}, {limit}')
+        compact = self._prepare_page_render()
+        try:
+            return '\n'.join(self._iter_rows_lines(compact, offset, min(offset + limit, self.total_lines))) + '\n'
+        finally:
+            self._cell_cache = None
+
+    def iter_pages(self, page_size: int) -> Iterator[str]:
+        """Generate the table as printable pages of `page_size` rows, each with its own header and borders.
+
+        Column widths are computed once, so all pages line up (see render_page())."""
+        if page_size < 1:
+            raise ValueError(f'NiceTable.iter_pages(): page_size should be a positive number, got {page_size}')
+        compact = self._prepare_page_render()
+        try:
+            for offset in range(0, max(self.total_lines, 1), page_size):  # an empty table has a header-only page
+                yield '\n'.join(self._iter_rows_lines(compact, offset, min(offset + page_size, self.total_lines))) \
+                    + '\n'
+        finally:
+            self._cell_cache = None
+
+    def _prepare_render(self) -> bool:
+        """Compute the column attributes before rendering, returns whether the table is compact (see iter_lines())"""
+        self._drop_stale_columns_stats()
+        compact = self._is_compact()
+        if compact:
+            self._reset_columns_attributes()
+            self._col_widths_pending = True
+        else:
+            self._compute_columns_attributes()
+        return compact
+
+    def _prepare_page_render(self) -> bool:
+        """_prepare_render() for render_page() / iter_pages(), reusing the column attributes of the previous page"""
+        self._get_plans()
+        key = (self._plans_signature, tuple(self.col_names), self.total_lines)
+        if self._page_layout_cache is not None and self._page_layout_cache[0] == key:
+            self._set_columns_attributes(*self._page_layout_cache[1])
+            return False
+        compact = self._prepare_render()
+        if not compact:
+            self._page_layout_cache = (key, (list(self.col_is_numeric), list(self.col_digits_left),
+                                             list(self.col_digits_right), list(self.col_widths)))
+        return compact
+
+    def _iter_rows_lines(self, compact: bool, start: int, end: int) -> Iterator[str]:
+        """Generate the printable lines of the rows in [start, end), including the header and borders"""
+        top_lines, bottom_lines = self._generate_frame_lines()
+        yield from top_lines
+        yield from self._iter_compact_data_lines(start, end) if compact else self._iter_data_lines(start, end)
+        yield from bottom_lines
+
+    def _generate_frame_lines(self) -> Tuple[List[str], List[str]]:
+        """Generate the lines before the data lines (top border and header) and after them (bottom border)"""
+        top_lines = []
+        header_lines, sep_line = self._get_header_and_sepline()
         if self.border_top:
-            out.append(sep_line)
+            top_lines.append(sep_line)
         if self.header:
-            out += self._generate_header_lines()
+            top_lines += header_lines
             if self.header_sepline:
-                out.append(sep_line)
-        out += self._generate_data_lines()
-        if self.border_bottom:
-            out.append(sep_line)
+                top_lines.append(sep_line)
+        return top_lines, [sep_line] if self.border_bottom else []
+
+    def _get_header_and_sepline(self) -> Tuple[List[str], str]:
+        """The header lines (if the header is printed) and the separator line. They are kept between renders, until
+        the column names, their formatting or the column attributes (alignment and widths) change"""
+        if self._col_widths_pending:
+            # generating the header lines may compute the column widths, see _generate_output_lines_elements()
+            sep_line = self._generate_sepline()
+            return self._generate_header_lines() if self.header else [], sep_line
+        key = (self._plans_signature, tuple(self.col_names), tuple(self.col_is_numeric), tuple(self.col_digits_left),
+               tuple(self.col_digits_right), tuple(self.col_widths), self.header, self.sep_horizontal, self.sep_cross,
+               self.cell_spacing, self.border_left, self.border_right)
+        if self._frame_cache is None or self._frame_cache[0] != key:
+            header_cells = list(self._col_name_as_str_list(col_pos) for col_pos in self._visible_cols)
+            header_lines = self._generate_output_lines_elements(header_cells) if self.header else []
+            self._frame_cache = (key, header_lines, self._generate_sepline(header_cells))
+        return self._frame_cache[1], self._frame_cache[2]
+
+    async def aiter_lines(self, yield_every: int = 1000, max_concurrency: int = 100) -> AsyncIterator[str]:
+        """Async version of iter_lines(), which does not block the event loop of an asyncio application.
+
+        value_func and column functions may be coroutine functions (async def). They are awaited concurrently in
+        batches of `yield_every` values, with up to `max_concurrency` calls in flight, before the width pass.
+        Note that the numeric alignment of such columns is computed on the awaited values.
+        The width pass runs in a worker thread, and after it control is yielded every `yield_every` lines."""
+        if yield_every < 1:
+            raise ValueError(f'NiceTable.aiter_lines(): yield_every should be a positive number, got {yield_every}')
+        table = self._copy_for_render()  # the awaited values replace the table values only for this render
+        await table._await_async_funcs(yield_every, max_concurrency)
+        lines = table.iter_lines()
+        # the generator runs up to its first line, including the width pass, in a thread
+        get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)  # new in Python 3.7
+        line = await get_running_loop().run_in_executor(None, next, lines, None)
+        lines_count = 0
+        while line is not None:
+            yield line
+            lines_count += 1
+            if lines_count % yield_every == 0:
+                await asyncio.sleep(0)
+            line = next(lines, None)
+
+    def head(self, n: int = 10) -> 'NiceTable':
+        """A view of the first n rows, see tail()"""
+        if n < 0:
+            raise ValueError(f'NiceTable.head(): n should not be negative, got {n}')
+        return self._get_rows_view(range(min(n, self.total_lines)))
+
+    def tail(self, n: int = 10) -> 'NiceTable':
+        """A view of the last n rows - a table with the same settings, which references the columns of this table
+        through ColumnViews instead of copying them. Views are meant for rendering, they are not updated when rows
+        are appended to (or evicted from) this table, and rows cannot be appended to (or updated in) a view."""
+        if n < 0:
+            raise ValueError(f'NiceTable.tail(): n should not be negative, got {n}')
+        return self._get_rows_view(range(max(self.total_lines - n, 0), self.total_lines))
+
+    def sorted_by(self, col: Union[int, str], reverse: bool = False) -> 'NiceTable':
+        """A view of the rows sorted by the values of a column (None values last), see where().
+
+        The sort is stable, so views can be chained to sort by several columns - the last sort is the primary one."""
+        col_pos = self._get_col_pos(col, 'sorted_by')
+        try:
+            rows = self._argsort(self.columns[col_pos], reverse)
+        except TypeError as e:
+            raise TypeError(f'NiceTable.sorted_by(): the values of column "{self.col_names[col_pos]}" '
+                            f'cannot be compared ({e})') from None
+        return self._get_rows_view(rows)
+
+    def where(self, condition: Union[Callable[[Dict[str, Any]], bool], Dict[Union[int, str], Any]]) -> 'NiceTable':
+        """A view of the rows that match the condition - either a function that gets a row as a dict of
+        {column name: value}, or a dict of {column name or position: value} that all must be equal to the row values.
+
+        Like head() / tail(), the views of sorted_by() and where() reference the columns of this table, and hold
+        only the positions of the selected rows. They can be chained, for example
+        `table.where({'Type': 'Psychic'}).sorted_by('Weight(kg)')`."""
+        if isinstance(condition, dict):
+            rows = range(self.total_lines)
+            for col, value in condition.items():
+                column = self.columns[self._get_col_pos(col, 'where')]
+                rows = list(row for row in rows if column[row] == value)
+        elif callable(condition):
+            col_names = self.col_names
+            rows = list(row for row, values in enumerate(zip(*self.columns))
+                        if condition(dict(zip(col_names, values))))
+        else:
+            raise TypeError(f'NiceTable.where(): expecting a function or a dict, got {type(condition)}')
+        return self._get_rows_view(array.array('q', rows))
+
+    @staticmethod
+    def _argsort(column: Sequence[Any], reverse: bool) -> Sequence[int]:
+        """The row positions of the column in sorted order (stable, None values last)"""
+        if type(column) is CompactColumn and column.typecode is not None:
+            # a typed compact column is sorted by the raw array values, without creating the Python values
+            values = column.values
+            if np is not None:
+                keys = np.frombuffer(values, dtype=np.int64 if column.typecode == 'q' else np.float64)
+                rows = np.arange(len(keys))
+                if column.has_nulls:
+                    nulls = np.unpackbits(np.frombuffer(column._nulls, dtype=np.uint8), bitorder='little')
+                    rows = rows[nulls[:len(keys)] == 0]
+                if reverse:  # a stable descending sort - equal values keep their order
+                    rows = rows[::-1][np.argsort(keys[rows][::-1], kind='stable')[::-1]]
+                else:
+                    rows = rows[np.argsort(keys[rows], kind='stable')]
+                not_null_rows = array.array('q', rows.astype(np.int64).tobytes())
+            else:
+                not_null_rows = array.array('q', sorted((row for row in range(len(values)) if not column._is_null(row)),
+                                                        key=values.__getitem__, reverse=reverse))
+        else:
+            values = list(column)
+            not_null_rows = array.array('q', sorted((row for row, value in enumerate(values) if value is not None),
+                                                    key=values.__getitem__, reverse=reverse))
+        if len(not_null_rows) < len(column):
+            not_null_rows.extend(row for row in range(len(column)) if column[row] is None)
+        return not_null_rows
+
+    def _get_rows_view(self, rows: Union[range, Sequence[int]]) -> 'NiceTable':
+        view = self._copy_for_render()
+        view.columns = list(ColumnView(column, rows) for column in self.columns)
+        view.total_lines = len(rows)
+        view._array_columns = False
+        view._read_only = True
+        view._reset_columns_stats()
+        return view
+
+    def _copy_for_render(self) -> 'NiceTable':
+        """A shallow copy of the table that can be rendered on its own - it shares the data, not the render state"""
+        table = copy.copy(self)
+        table.columns = list(self.columns)
+        table.col_funcs = list(self.col_funcs)
+        table.col_hidden = list(self.col_hidden)
+        for stats_name in ('_stats_is_numeric', '_stats_digits_left', '_stats_digits_right', '_stats_widths'):
+            setattr(table, stats_name, list(getattr(self, stats_name)))
+        return table
+
+    async def _await_async_funcs(self, batch_size: int, max_concurrency: int) -> None:
+        """Replace the values of columns that have a coroutine function by the awaited results of that function"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def call(func: Callable[[Any], Any], value: Any) -> Any:
+            async with semaphore:
+                return await func(value)
+
+        for col_pos in self._get_visible_cols():
+            func = self.col_funcs[col_pos] or self.value_func
+            if not inspect.iscoroutinefunction(func):
+                continue
+            column = self.columns[col_pos]
+            awaited_values = []
+            for start in range(0, len(column), batch_size):
+                awaited_values += await asyncio.gather(*(call(func, value)
+                                                         for value in column[start:start + batch_size]))
+            self.columns[col_pos] = awaited_values
+            self.col_funcs[col_pos] = _identity  # and not None, which falls back to value_func
+        if inspect.iscoroutinefunction(self.value_func):
+            self.value_func = None
+
+    def render(self, parallel: Optional[int] = None, stats: bool = False,
+               progress: Optional[Callable[[str, int, int], Any]] = None, every_rows: int = 10000,
+               max_seconds: Optional[float] = None, max_rows: Optional[int] = None) -> str:
+        """Render the printable table as a string, the same as str().
+
+        With `parallel=N`, the rows are split into N chunks, which are processed by a pool of N worker processes -
+        first applying the column functions and computing the numeric alignment, then the column widths, and finally
+        the output lines. It pays off when the value_func / column functions are CPU-heavy.
+        The functions are sent to the workers by pickling, so if they can't be pickled (like lambdas),
+        a warning is issued and the table is rendered serially.
+
+        With `stats=True`, statistics of the render are kept in `last_render_stats` (see _render_with_stats()).
+
+        A long render can be watched and limited - the rows are processed `every_rows` rows at a time, and after each
+        chunk `progress(phase, rows_done, rows)` is called, where phase is 'scan' (computing the column widths) or
+        'output'. If it returns False, the render is cancelled - the rows that were scanned (or output) so far are
+        rendered, without calling progress again. With `max_rows`, only the first max_rows rows are rendered, and
+        with `max_seconds`, the render stops after the chunk that ran out of time - the scan stops after half of the
+        time, keeping the rest for the output of the scanned rows. Either way, the output ends with a footer of the
+        number of rows that were left out (see BUDGET_FOOTER)."""
+        budgeted = progress is not None or max_seconds is not None or max_rows is not None
+        if budgeted:
+            if parallel is not None and parallel > 1:
+                raise ValueError('NiceTable.render(): progress, max_seconds and max_rows do not support parallel')
+            if every_rows < 1:
+                raise ValueError(f'NiceTable.render(): every_rows should be a positive number, got {every_rows}')
+            if (max_rows is not None and max_rows < 0) or (max_seconds is not None and max_seconds < 0):
+                raise ValueError(f'NiceTable.render(): max_rows and max_seconds should not be negative, '
+                                 f'got {max_rows}, {max_seconds}')
+
+            def render_serially(phases: Dict[str, float]) -> str:
+                return self._render_with_budget(phases, progress, every_rows, max_seconds, max_rows)
+        else:
+            render_serially = self._render_serially
+
+        if stats or self._render_stats_hook is not None:
+            return self._render_with_stats(parallel, render_serially)
+        if self._can_render_in_parallel(parallel):
+            return self._render_in_parallel(parallel)
+        return render_serially({})
+
+    def _render_serially(self, phases: Dict[str, float]) -> str:
+        """Render the table, keeping the time of each phase of the render in `phases`"""
+        perf_counter = time.perf_counter
+        phase_start = perf_counter()
+        compact = self._prepare_render()
+        phases['column_attributes'], phase_start = perf_counter() - phase_start, perf_counter()
+        try:
+            top_lines, bottom_lines = self._generate_frame_lines()
+            phases['header_and_borders'], phase_start = perf_counter() - phase_start, perf_counter()
+            data_lines = list(self._iter_compact_data_lines() if compact else self._iter_data_lines())
+            phases['data_lines'], phase_start = perf_counter() - phase_start, perf_counter()
+        finally:
+            self._cell_cache = None
+        out = '\n'.join(top_lines + data_lines + bottom_lines) + '\n'
+        phases['join'] = perf_counter() - phase_start
+        return out
+
+    def _render_with_budget(self, phases: Dict[str, float], progress: Optional[Callable[[str, int, int], Any]],
+                            every_rows: int, max_seconds: Optional[float], max_rows: Optional[int]) -> str:
+        """Render the table a chunk of rows at a time, reporting the progress and keeping the budgets (see render())"""
+        perf_counter = time.perf_counter
+        deadline = None if max_seconds is None else perf_counter() + max_seconds
+        total_lines = self.total_lines
+        rows = total_lines if max_rows is None else min(max_rows, total_lines)
+        exceeded_budget = f'max_rows={max_rows}' if rows < total_lines else None
+        self.total_lines = rows  # the rows after max_rows are never scanned, even for a compact table
+        self._drop_stale_columns_stats()
+        try:
+            phase_start = perf_counter()
+            compact = self._is_compact()
+            if compact:
+                self._reset_columns_attributes()
+                self._col_widths_pending = True
+            else:
+                scanned_rows, cancelled = self._scan_rows(every_rows, progress,
+                                                          None if deadline is None else deadline - max_seconds / 2)
+                if cancelled:
+                    progress = None  # the scanned rows are output, without asking again
+                if scanned_rows < rows:
+                    rows = self.total_lines = scanned_rows
+                    exceeded_budget = 'cancelled' if cancelled else f'max_seconds={max_seconds}'
+            phases['column_attributes'], phase_start = perf_counter() - phase_start, perf_counter()
+            try:
+                top_lines, bottom_lines = self._generate_frame_lines()
+                phases['header_and_borders'], phase_start = perf_counter() - phase_start, perf_counter()
+                data_lines = []
+                for start in range(0, rows, every_rows):
+                    if deadline is not None and perf_counter() > deadline:
+                        rows = start
+                        exceeded_budget = f'max_seconds={max_seconds}'
+                        break
+                    end = min(start + every_rows, rows)
+                    data_lines += self._iter_compact_data_lines(start, end) if compact else \
+                        self._iter_data_lines(start, end)
+                    if progress is not None and progress('output', end, rows) is False and end < rows:
+                        rows = end
+                        exceeded_budget = 'cancelled'
+                        break
+                phases['data_lines'], phase_start = perf_counter() - phase_start, perf_counter()
+            finally:
+                self._cell_cache = None
+        finally:
+            self.total_lines = total_lines
+        if exceeded_budget is not None:
+            bottom_lines.append(self.BUDGET_FOOTER.format(rows_left_out=total_lines - rows, rows=total_lines,
+                                                          budget=exceeded_budget))
+        out = '\n'.join(top_lines + data_lines + bottom_lines) + '\n'
+        phases['join'] = perf_counter() - phase_start
+        return out
+
+    def _scan_rows(self, every_rows: int, progress: Optional[Callable[[str, int, int], Any]],
+                   deadline: Optional[float]) -> Tuple[int, bool]:
+        """Compute the column attributes `every_rows` rows at a time, through the incremental column statistics.
+
+        Returns the number of rows scanned, which is less than total_lines if the deadline passed or progress()
+        returned False, and whether progress() returned False"""
+        rows = self.total_lines
+        scanned_rows = 0
+        if self._stats_signature == self._formatting_signature() and self._stats_rows <= rows:
+            scanned_rows = self._stats_rows  # already reflected in the column statistics
+        cell_cache: List[Optional[Tuple[int, List[List[str]], Optional[List[Any]]]]] = \
+            list(None for _ in range(self.total_cols))
+        try:
+            while True:
+                self.total_lines = min(scanned_rows + every_rows, rows)
+                self._cell_cache = cell_cache  # the processed values of the previous chunks, in case of a rescan
+                self._compute_columns_attributes()
+                scanned_rows = self.total_lines
+                # merge the render cache of the chunk - the strings up to CELL_CACHE_ROWS rows and all the processed
+                # values, unless the column was rescanned from the first row
+                for col_pos, chunk_cache in enumerate(self._cell_cache):
+                    if chunk_cache is None:
+                        continue
+                    cache = cell_cache[col_pos]
+                    if cache is None or chunk_cache[0] <= cache[0]:
+                        cell_cache[col_pos] = (chunk_cache[0], list(chunk_cache[1]), chunk_cache[2])
+                        continue
+                    if chunk_cache[0] == cache[0] + len(cache[1]):
+                        cache[1].extend(chunk_cache[1][:max(self.CELL_CACHE_ROWS - len(cache[1]), 0)])
+                    if cache[2] is not None and chunk_cache[0] == cache[0] + len(cache[2]):
+                        cache[2].extend(chunk_cache[2])
+                if progress is not None and progress('scan', scanned_rows, rows) is False:
+                    return scanned_rows, True
+                if scanned_rows >= rows or (deadline is not None and time.perf_counter() > deadline):
+                    return scanned_rows, False
+        finally:
+            self._cell_cache = cell_cache
+            self.total_lines = rows
+
+    def _render_with_stats(self, parallel: Optional[int], render_serially: Callable[[Dict[str, float]], str]) -> str:
+        """Render the table and keep the statistics of the render in `last_render_stats`, as a dict of:
+            rows, columns - the size of the table (visible columns only)
+            seconds, phases - the wall time of the render, and of each of its phases: computing the column attributes
+                (which includes the column function calls), the header and borders, the data lines and joining them
+            func_calls, func_seconds - number of value_func / column function calls and their cumulative time
+            cells_wrapped, cells_truncated - number of cells longer than max_len
+            output_lines, output_bytes - the size of the output (UTF-8 encoded)
+        With parallel rendering, the function calls and the cells are counted by the workers, so they are None.
+        The statistics are also passed to the render stats hook, if set (see set_render_stats_hook())"""
+        perf_counter = time.perf_counter
+        plans, _ = self._get_plans()
+        func_stats = [0, 0.0]  # calls, seconds
+
+        def timed(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+            def timed_func(value: Any) -> Any:
+                start = perf_counter()
+                try:
+                    return func(value)
+                finally:
+                    func_stats[0] += 1
+                    func_stats[1] += perf_counter() - start
+            return timed_func
+
+        render_start = perf_counter()
+        phases = {}
+        in_parallel = self._can_render_in_parallel(parallel)
+        if in_parallel:
+            out = self._render_in_parallel(parallel)
+            phases['parallel'] = perf_counter() - render_start
+        else:
+            funcs = list(plan.func for plan in plans)
+            for plan in plans:
+                plan.wrapped_cells = plan.truncated_cells = 0
+                if plan.func is not None:
+                    plan.func = timed(plan.func)
+            try:
+                out = render_serially(phases)
+            finally:
+                for plan, func in zip(plans, funcs):
+                    plan.func = func
+
+        visible_plans = list(plans[col_pos] for col_pos in self._visible_cols)
+        self.last_render_stats = {
+            'rows': self.total_lines,
+            'columns': len(visible_plans),
+            'seconds': perf_counter() - render_start,
+            'phases': phases,
+            'func_calls': None if in_parallel else func_stats[0],
+            'func_seconds': None if in_parallel else func_stats[1],
+            'cells_wrapped': None if in_parallel else sum(plan.wrapped_cells for plan in visible_plans),
+            'cells_truncated': None if in_parallel else sum(plan.truncated_cells for plan in visible_plans),
+            'output_lines': out.count('\n'),
+            'output_bytes': len(out.encode('utf-8')),
+        }
+        if self._render_stats_hook is not None:
+            self._render_stats_hook(self.last_render_stats)
+        return out
+
+    def _can_render_in_parallel(self, parallel: Optional[int]) -> bool:
+        if parallel is None or parallel <= 1 or self.total_lines <= 1:
+            return False
+        try:
+            pickle.dumps((type(self), self.value_func, self.col_funcs, self.FORMATTERS))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            warnings.warn(f'NiceTable.render(): cannot send the table functions to worker processes ({e}), '
+                          'rendering serially', RuntimeWarning)
+            return False
+        return True
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # render plans are rebuilt on demand, and they hold closures which can't be pickled
+        state = self.__dict__.copy()
+        state.update(_plans_signature=None, _plans=[], _header_plans=[], _cell_cache=None,
+                     _header_lens_cache=None, _frame_cache=None)
+        state['FORMATTERS'] = self.FORMATTERS  # a worker process may not have the registered formatters
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    def _get_rows_chunk(self, start: int, end: int) -> 'NiceTable':
+        """A shallow copy of the table with only the rows in [start, end)"""
+        chunk = copy.copy(self)
+        chunk.columns = list([] if hidden else column[start:end]
+                             for column, hidden in zip(self.columns, self.col_hidden))
+        chunk.total_lines = max(min(end, self.total_lines) - start, 0)
+        return chunk
+
+    def _get_rows_chunks(self, parallel: int) -> List['NiceTable']:
+        """Split the rows to (up to) `parallel` chunks of consecutive rows"""
+        chunk_rows = -(-self.total_lines // parallel)  # rounded up
+        return list(self._get_rows_chunk(start, start + chunk_rows) for start in range(0, self.total_lines, chunk_rows))
+
+    def _render_in_parallel(self, parallel: int) -> str:
+        chunks = self._get_rows_chunks(parallel)
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            self._compute_chunks_attributes(chunks, executor.map)
+
+            # 3. render the data lines of each chunk, and put them together in order
+            top_lines, bottom_lines = self._generate_frame_lines()
+            out = top_lines
+            out += executor.map(NiceTable._render_chunk_data_lines, chunks, itertools.repeat(self.col_is_numeric),
+                                itertools.repeat(self.col_digits_left), itertools.repeat(self.col_digits_right),
+                                itertools.repeat(self.col_widths))
+            out += bottom_lines
         return '\n'.join(out) + '\n'
 
-    def _compute_columns_attributes(self):
-        def get_left_right_digits(n: numbers.Number) -> Tuple[int, int]:
-            if n is None:
-                return 0, 0
-            as_string = str(n)
-            dot_pos = as_string.find('.')
-            if dot_pos == -1:
-                return len(as_string), 0
+    def _compute_chunks_attributes(self, chunks: List['NiceTable'], map_func: Callable[..., Iterator[Any]],
+                                   encoding: Optional[str] = None) -> List[Any]:
+        """Compute the column attributes of the table from its chunks of rows, each processed by map_func (the map of
+        a process pool, or the builtin map). Returns the output size of each chunk, if encoding is set (see
+        _get_chunk_widths())"""
+        # 1. apply the column functions, and merge the numeric statistics of all chunks.
+        #    The rest of the work is done on the processed values
+        chunks_stats = list(map_func(NiceTable._get_chunk_stats, chunks))
+        for chunk, (_, _, _, processed_columns) in zip(chunks, chunks_stats):
+            for col_pos, processed_values in processed_columns.items():
+                chunk.columns[col_pos] = processed_values
+            chunk.value_func = None
+            chunk.col_funcs = list(None for _ in range(self.total_cols))
+        is_numeric = list(all(stats[0][col_pos] for stats in chunks_stats) for col_pos in range(self.total_cols))
+        digits_left = list(max(stats[1][col_pos] for stats in chunks_stats) if is_numeric[col_pos] else 0
+                           for col_pos in range(self.total_cols))
+        digits_right = list(max(stats[2][col_pos] for stats in chunks_stats) if is_numeric[col_pos] else 0
+                            for col_pos in range(self.total_cols))
+
+        # 2. merge the max data width of all chunks
+        self._reset_columns_attributes()
+        col_widths = self._get_header_lens()
+        chunks_sizes = []
+        for chunk_widths, chunk_sizes in map_func(NiceTable._get_chunk_widths, chunks, itertools.repeat(is_numeric),
+                                                  itertools.repeat(digits_left), itertools.repeat(digits_right),
+                                                  itertools.repeat(encoding)):
+            col_widths = list(map(max, col_widths, chunk_widths))
+            chunks_sizes.append(chunk_sizes)
+        col_widths = list(max(width, self.value_min_len) for width in col_widths)
+        self._set_columns_attributes(is_numeric, digits_left, digits_right, col_widths)
+        return chunks_sizes
+
+    def _get_chunk_stats(self) -> Tuple[List[bool], List[int], List[int], Dict[int, List[Any]]]:
+        """Apply the column functions to a chunk of rows (see render()) and compute its numeric statistics.
+
+        Returns whether each column is numeric, its number of digits, and the processed values of columns that
+        have a function"""
+        plans, _ = self._get_plans()
+        is_numeric = list(False for _ in range(self.total_cols))
+        digits_left = list(0 for _ in range(self.total_cols))
+        digits_right = list(0 for _ in range(self.total_cols))
+        processed_columns = {}
+        for col_pos in self._visible_cols:
+            plan = plans[col_pos]
+            values = self._as_python_values(self.columns[col_pos])
+            if plan.func is None:
+                processed_values = values
+            else:
+                processed_values = processed_columns[col_pos] = list(map(plan.func, values))
+            is_numeric[col_pos] = all(processed_value is None or plan.is_number(processed_value)
+                                      for processed_value in processed_values)
+            # as in _compute_columns_attributes(), the digits are counted on the values before the column function
+            len_pairs_list = list(map(self._get_left_right_digits, values)) if is_numeric[col_pos] else []
+            digits_left[col_pos] = max((pair[0] for pair in len_pairs_list), default=0)
+            digits_right[col_pos] = max((pair[1] for pair in len_pairs_list), default=0)
+        return is_numeric, digits_left, digits_right, processed_columns
+
+    def _get_chunk_widths(self, is_numeric: List[bool], digits_left: List[int], digits_right: List[int],
+                          encoding: Optional[str] = None) -> Tuple[List[int], Optional[Tuple[int, int, Dict]]]:
+        """The max data width of each column in a chunk of processed rows (see render()).
+
+        With encoding, also returns what the size of the encoded data lines depends on, besides the column widths
+        (see _write_to_mmap()): the number of output lines, the bytes beyond one per character of the cells that are
+        padded, and the number of lines and the bytes of the cells of each 'compact' column, which are not padded"""
+        plans, _ = self._get_plans()
+        widths = list(0 for _ in range(self.total_cols))
+        row_lines = None  # the number of output lines of each row, if some row is multi-line
+        extra_bytes = 0
+        compact_cols = {}
+        for col_pos in self._visible_cols:
+            plan = plans[col_pos]
+            plan.set_digits(is_numeric[col_pos], digits_left[col_pos], digits_right[col_pos])
+            str_lists = map(plan.to_str_list, self._as_python_values(self.columns[col_pos]))
+            if encoding is not None:
+                str_lists = list(str_lists)
+                cell_lines = sum(map(len, str_lists))
+                if cell_lines > self.total_lines:
+                    row_lines = list(map(max, row_lines or itertools.repeat(1, self.total_lines), map(len, str_lists)))
+                if plan.adjust == 'compact':
+                    min_len = plan.min_len
+                    text = ''.join(s.strip().ljust(min_len) for str_list in str_lists for s in str_list)
+                    compact_cols[col_pos] = (cell_lines, len(text.encode(encoding)))
+                else:
+                    text = ''.join(s for str_list in str_lists for s in str_list)
+                    extra_bytes += len(text.encode(encoding)) - len(text)
+            all_col_str = (s for str_list in str_lists for s in str_list)
+            if plan.adjust == 'compact':
+                widths[col_pos] = max((len(s.strip()) for s in all_col_str), default=0)
             else:
-                return len(as_string[:dot_pos]), len(as_string[dot_pos + 1:])
+                widths[col_pos] = max((len(s) for s in all_col_str), default=0)
+        if encoding is None:
+            return widths, None
+        return widths, (self.total_lines if row_lines is None else sum(row_lines), extra_bytes, compact_cols)
+
+    def _render_chunk_data_lines(self, is_numeric: List[bool], digits_left: List[int], digits_right: List[int],
+                                 widths: List[int]) -> str:
+        """The data lines of a chunk of processed rows (see render()), as a single string"""
+        self._set_columns_attributes(is_numeric, digits_left, digits_right, widths)
+        return '\n'.join(self._iter_data_lines())
+
+    def write(self, fp: Any, chunk_lines: int = 10000, encoding: str = 'utf-8') -> 'NiceTable':
+        """Write the printable table to a file-like object, as rendered by iter_lines().
+
+        Lines are joined and written in chunks of `chunk_lines`, so memory use does not depend on the number of rows.
+        Binary file objects are supported as well, each chunk is encoded with `encoding`."""
+        if chunk_lines < 1:
+            raise ValueError(f'NiceTable.write(): chunk_lines should be a positive number, got {chunk_lines}')
+        mode = getattr(fp, 'mode', None)
+        binary = isinstance(fp, (io.RawIOBase, io.BufferedIOBase)) or (isinstance(mode, str) and 'b' in mode)
+        lines = self.iter_lines()
+        while True:
+            chunk = list(itertools.islice(lines, chunk_lines))
+            if not chunk:
+                break
+            chunk.append('')  # a newline after the last line
+            text = '\n'.join(chunk)
+            fp.write(text.encode(encoding) if binary else text)
+        return self
 
-        # setting initial mutable values for the calls to _value_as_str_list()
+    def to_file(self, path: str, encoding: str = 'utf-8', compression: Optional[str] = None,
+                chunk_lines: int = 10000, mmap: bool = False, parallel: Optional[int] = None) -> 'NiceTable':
+        """Write the printable table to a file, optionally compressed with one of COMPRESSION_OPTIONS (see write()).
+
+        With `mmap=True` and `parallel=N`, the size of the file and the offset of each chunk of rows are computed
+        upfront, during the width pass. The file is then memory-mapped, and each of N worker processes writes its chunk
+        of rows straight into its offset (see render(parallel=N) for the functions of the table). Without parallel
+        (or if the functions can't be sent to worker processes) the file is written by write(), which keeps only a
+        chunk of lines in memory.
+        The encoding should encode the ASCII characters as single bytes, like 'utf-8' and 'latin-1'."""
+        if compression is not None and compression not in self.COMPRESSION_OPTIONS:
+            raise ValueError(f'NiceTable.to_file(): got compression "{compression}", '
+                             f'expecting one of {self.COMPRESSION_OPTIONS} or None')
+        if mmap:
+            if compression is not None:
+                raise ValueError('NiceTable.to_file(): mmap=True does not support compression')
+            if 'a \n'.encode(encoding) != b'a \n':
+                raise ValueError(f'NiceTable.to_file(): mmap=True expects an ASCII-compatible encoding, got {encoding}')
+            if self._can_render_in_parallel(parallel):
+                self._write_to_mmap(path, encoding, parallel)
+                return self
+        elif parallel is not None:
+            raise ValueError('NiceTable.to_file(): parallel is supported only with mmap=True')
+        opener = open if compression is None else importlib.import_module(compression).open
+        with opener(path, 'wb') as fp:
+            self.write(fp, chunk_lines=chunk_lines, encoding=encoding)
+        return self
+
+    def _write_to_mmap(self, path: str, encoding: str, parallel: int) -> None:
+        """Write the printable table to a memory-mapped file, each chunk of rows at its precomputed offset.
+
+        Once the column widths are known, every output line of the padded columns has the same number of characters,
+        so the size of a chunk is a prefix sum of the number of output lines of its rows (which is more than one
+        per row only for multi-line cells), plus the bytes of the multi-byte characters and of the 'compact' cells"""
+        chunks = self._get_rows_chunks(parallel)
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            chunks_sizes = self._compute_chunks_attributes(chunks, executor.map, encoding)
+            top_lines, bottom_lines = self._generate_frame_lines()
+            head = ''.join(line + '\n' for line in top_lines).encode(encoding)
+            tail = ''.join(line + '\n' for line in bottom_lines).encode(encoding)
+
+            # the bytes of an output line, besides the cells of the 'compact' columns and the multi-byte characters
+            plans, col_widths = self._plans, self.col_widths
+            empty_line = self._wrap_line_with_borders(self._get_value_sep().join('' for _ in self._visible_cols))
+            line_bytes = len(empty_line.encode(encoding)) + 1 + \
+                sum(col_widths[col_pos] for col_pos in self._visible_cols if plans[col_pos].adjust != 'compact')
+            offsets = []
+            offset = len(head)
+            for output_lines, extra_bytes, compact_cols in chunks_sizes:
+                offsets.append(offset)
+                offset += output_lines * line_bytes + extra_bytes
+                for col_pos, (cell_lines, cells_bytes) in compact_cols.items():
+                    offset += cells_bytes + (output_lines - cell_lines) * col_widths[col_pos]  # see missing lines
+            offsets.append(offset)
+
+            with open(path, 'wb+') as f:
+                f.truncate(offset + len(tail))
+                with mmap.mmap(f.fileno(), 0) as mapped_file:
+                    mapped_file[:len(head)] = head
+                    mapped_file[offset:] = tail
+                    mapped_file.flush()
+            list(executor.map(NiceTable._write_chunk_data_lines, chunks, itertools.repeat(self.col_is_numeric),
+                              itertools.repeat(self.col_digits_left), itertools.repeat(self.col_digits_right),
+                              itertools.repeat(col_widths), itertools.repeat(path), itertools.repeat(encoding),
+                              offsets[:-1], offsets[1:]))
+
+    def _write_chunk_data_lines(self, is_numeric: List[bool], digits_left: List[int], digits_right: List[int],
+                                widths: List[int], path: str, encoding: str, start: int, end: int) -> None:
+        """Write the data lines of a chunk of processed rows into the bytes [start, end) of a file (see to_file())"""
+        data_lines = self._render_chunk_data_lines(is_numeric, digits_left, digits_right, widths)
+        data = (data_lines + '\n').encode(encoding)
+        if len(data) != end - start:
+            raise RuntimeError(f'NiceTable.to_file(): expected {end - start} bytes of data lines, got {len(data)}')
+        with open(path, 'r+b') as f:
+            with mmap.mmap(f.fileno(), 0) as mapped_file:
+                mapped_file[start:end] = data
+                mapped_file.flush()
+
+    def _formatting_signature(self) -> Tuple:
+        """Snapshot of everything that affects how data cells are formatted, used to invalidate column statistics
+        and render plans"""
+        return (self.total_cols, tuple(map(id, self.columns)),
+                self.cell_adjust, self.value_max_len, self.value_too_long_policy, self.value_newline_replace,
+                self.value_none_string, self.value_escape_type, self.value_escape_char, self.sep_vertical,
+                self.value_func, tuple(self.col_adjust), tuple(self.col_max_len), tuple(self.col_newline_replace),
+                tuple(self.col_none_string), tuple(self.col_funcs), tuple(self.col_hidden), self.FORMATTERS)
+
+    def _get_plans(self) -> Tuple[List[_ColumnPlan], List[_ColumnPlan]]:
+        """The render plans of the data cells and of the header cells of each column, rebuilt if a setting changed"""
+        signature = self._formatting_signature() + (self.header_adjust, self.value_min_len)
+        if signature != self._plans_signature:
+            # escaping the sep_vertical character by policy
+            sep = self.sep_vertical
+            escaped_sep = {'remove': '',
+                           'replace': self.value_escape_char,
+                           'prefix': self.value_escape_char + sep}.get(self.value_escape_type)
+            quote_chars = (sep, '"', '\n', '\r')
+
+            def to_str(value: Any) -> str:
+                return str(value).replace(sep, escaped_sep)
+
+            def to_quoted_str(value: Any) -> str:
+                # RFC 4180 - a value with the separator, a double quote or a newline is quoted, quotes are doubled
+                s = str(value)
+                if any(c in s for c in quote_chars):
+                    return '"' + s.replace('"', '""') + '"'
+                return s
+
+            if self.value_escape_type == 'quote':
+                to_str = to_quoted_str
+            elif escaped_sep is None:  # 'ignore'
+                to_str = str
+
+            def plan(pos: int, is_header: bool) -> _ColumnPlan:
+                if not is_header and not self.col_hidden[pos] and \
+                        inspect.iscoroutinefunction(self.col_funcs[pos] or self.value_func):
+                    raise TypeError(f'NiceTable.iter_lines(): the function of column "{self.col_names[pos]}" '
+                                    'is a coroutine function, render the table with aiter_lines()')
+                adjust = self.header_adjust if is_header else self.col_adjust[pos] or self.cell_adjust
+                return _ColumnPlan(func=None if is_header else self.col_funcs[pos] or self.value_func,
+                                   adjust=adjust,
+                                   to_str=to_str,
+                                   # a quoted value keeps its newlines in a compact cell, a padded cell is multi-line
+                                   split_lines=self.value_escape_type != 'quote' or adjust != 'compact',
+                                   none_string=self.col_none_string[pos] or self.value_none_string,
+                                   newline_replace=self.col_newline_replace[pos] or self.value_newline_replace,
+                                   max_len=self.col_max_len[pos] or self.value_max_len,
+                                   too_long_policy=self.value_too_long_policy,
+                                   min_len=self.value_min_len,
+                                   formatters=self.FORMATTERS)
+
+            self._plans = list(plan(col_pos, False) for col_pos in range(self.total_cols))
+            self._header_plans = list(plan(col_pos, True) for col_pos in range(self.total_cols))
+            self._visible_cols = self._get_visible_cols()
+            self._plans_signature = signature
+        return self._plans, self._header_plans
+
+    def _is_compact(self) -> bool:
+        """Whether all the cells, including the header, are rendered with 'compact' adjust (no padding)"""
+        plans, header_plans = self._get_plans()
+        return all(plans[col_pos].adjust == 'compact' and header_plans[col_pos].adjust == 'compact'
+                   for col_pos in self._visible_cols)
+
+    def _get_visible_cols(self) -> List[int]:
+        """The positions of the columns that are rendered (not hidden). Hidden columns are never scanned or formatted"""
+        return list(col_pos for col_pos, hidden in enumerate(self.col_hidden) if not hidden)
+
+    def _reset_columns_attributes(self) -> None:
+        """Set the initial column attributes of a render, before the numeric alignment and widths are known"""
+        plans, header_plans = self._get_plans()
+        for col_pos in self._visible_cols:
+            for plan in (plans[col_pos], header_plans[col_pos]):
+                plan.set_digits(False, 0, 0)
+                plan.set_width(self.value_min_len)
+        self._col_widths_pending = False
         self.col_widths = list(self.value_min_len for _ in range(self.total_cols))
         self.col_is_numeric = list(False for _ in range(self.total_cols))
         self.col_digits_left = list(0 for _ in range(self.total_cols))
         self.col_digits_right = list(0 for _ in range(self.total_cols))
-        for col_pos in range(self.total_cols):
-            col_header_len = max(len(col_name_line) for col_name_line in self._col_name_as_str_list(col_pos))
-            if self.total_lines == 0:
-                self.col_widths[col_pos] = col_header_len
-                break
 
-            # Check whether all values in the column are numeric / None, after applying column function, if any
-            func = self.col_funcs[col_pos] or self.value_func
-            col_is_numeric = True
-            for value in self.columns[col_pos]:
-                processed_value = value if func is None else func(value)
-                if not isinstance(processed_value, numbers.Number) and processed_value is not None:
-                    col_is_numeric = False
-                    break
-
-            if col_is_numeric:
+    def _reset_columns_stats(self) -> None:
+        """Drop the running column statistics, so the next render rescans all rows"""
+        self._stats_rows = 0  # number of rows already reflected in the statistics below
+        self._stats_signature: Optional[Tuple] = None
+        self._stats_is_numeric = [True] * self.total_cols
+        self._stats_digits_left = [0] * self.total_cols
+        self._stats_digits_right = [0] * self.total_cols
+        self._stats_widths = [0] * self.total_cols  # max data width, excluding the header
+        # the column attributes of the previous page, see _prepare_page_render()
+        self._page_layout_cache: Optional[Tuple[Tuple, Tuple[List[bool], List[int], List[int], List[int]]]] = None
+
+    def _drop_stale_columns_stats(self) -> None:
+        """Called as a render starts - without incremental_stats, all rows are scanned, as cells may have been edited"""
+        if not self.incremental_stats:
+            self._reset_columns_stats()
+
+    def _compute_columns_attributes(self):
+        """Compute the width and numeric attributes of each column.
+
+        Column statistics are kept between calls, so only rows appended since the previous call are scanned (across
+        renders only with incremental_stats, see _drop_stale_columns_stats()).
+        They are rebuilt from scratch when a formatting setting changes, and a single column is rescanned if its
+        numeric alignment (number of digits) changed, since it changes the width of all of its cells."""
+        get_left_right_digits = self._get_left_right_digits
+
+        # setting initial mutable values, the header lengths are computed before the numeric alignment is known
+        self._reset_columns_attributes()
+        plans, header_plans = self._plans, self._header_plans
+        previous_cache = self._cell_cache or list(None for _ in range(self.total_cols))  # see _scan_rows()
+        self._cell_cache = list(None for _ in range(self.total_cols))
+        col_header_lens = self._get_header_lens()
+        if self.total_lines == 0:
+            if self._visible_cols:
+                first_col = self._visible_cols[0]
+                self.col_widths[first_col] = col_header_lens[first_col]
+                header_plans[first_col].set_width(col_header_lens[first_col])
+            return
+
+        signature = self._formatting_signature()
+        if signature != self._stats_signature or self.total_lines < self._stats_rows:
+            self._reset_columns_stats()
+            self._stats_signature = signature
+        start = self._stats_rows
+
+        for col_pos in self._visible_cols:
+            # Apply the column function (if any) once per new cell; the processed values are reused below
+            plan = plans[col_pos]
+            func = plan.func
+            fitted_cells = (plan.wrapped_cells, plan.truncated_cells)  # cells are counted as they are output
+            column = self.columns[col_pos]
+            end = self.total_lines  # less than the column length while scanning in chunks, see _scan_rows()
+            new_values = column[start:end] if start or end < len(column) or type(column) is not list else column
+            if func is None:
+                new_values = self._as_python_values(new_values)
+            processed_values = new_values if func is None else list(map(func, new_values))
+
+            # Check whether all values in the column are numeric / None, after applying column function, if any.
+            # A typed compact column is numeric by definition, and computes its digits directly from the array.
+            # Similarly, int columns (of any storage) are handled by vectorized numpy code, if numpy is installed,
+            # and the dtype of a numpy array column (see from_dataframe) saves the type checks.
+            # These shortcuts are skipped if a formatter is registered for the type of the values
+            is_typed_column = type(column) is CompactColumn and column.typecode is not None
+            is_numeric_array = np is not None and isinstance(column, np.ndarray) and column.dtype.kind in 'iuf'
+            vectorized = func is None and self._has_builtin_number_format(column, plan)
+            int_array = None
+            if vectorized and self._stats_is_numeric[col_pos]:
+                int_array = self._as_numpy_int_array(column, start, end)
+            rescan = False
+            if self._stats_is_numeric[col_pos]:
+                if int_array is not None:
+                    col_is_numeric = True
+                    digits_left = max(len(str(int_array.min())), len(str(int_array.max())))
+                    digits_right = 0
+                elif vectorized and is_typed_column:
+                    col_is_numeric = True
+                    digits_left, digits_right = column.numeric_digits(start, end) if new_values else (0, 0)
+                else:
+                    col_is_numeric = (vectorized and is_numeric_array) or \
+                        all(processed_value is None or plan.is_number(processed_value)
+                            for processed_value in processed_values)
+                    if col_is_numeric:
+                        digits_left, digits_right = 0, 0
+                        for block_start in range(0, len(new_values), self.CELL_CACHE_ROWS):
+                            len_pairs_list = list(map(get_left_right_digits,
+                                                      new_values[block_start:block_start + self.CELL_CACHE_ROWS]))
+                            digits_left = max(digits_left, max(pair[0] for pair in len_pairs_list))
+                            digits_right = max(digits_right, max(pair[1] for pair in len_pairs_list))
+
+                if not col_is_numeric:
+                    self._stats_is_numeric[col_pos] = False
+                    rescan = start > 0
+                elif digits_left > self._stats_digits_left[col_pos] or \
+                        digits_right > self._stats_digits_right[col_pos]:
+                    self._stats_digits_left[col_pos] = max(digits_left, self._stats_digits_left[col_pos])
+                    self._stats_digits_right[col_pos] = max(digits_right, self._stats_digits_right[col_pos])
+                    rescan = start > 0
+
+            if self._stats_is_numeric[col_pos]:
                 self.col_is_numeric[col_pos] = True
-                len_pairs_list = list(get_left_right_digits(value) for value in self.columns[col_pos])
-                self.col_digits_left[col_pos] = max(pair[0] for pair in len_pairs_list)
-                self.col_digits_right[col_pos] = max(pair[1] for pair in len_pairs_list)
+                self.col_digits_left[col_pos] = self._stats_digits_left[col_pos]
+                self.col_digits_right[col_pos] = self._stats_digits_right[col_pos]
+                plan.set_digits(True, self.col_digits_left[col_pos], self.col_digits_right[col_pos])
+                header_plans[col_pos].set_digits(True, self.col_digits_left[col_pos], self.col_digits_right[col_pos])
+
+            # the alignment of the old rows changed - they are formatted again, from the first row
+            cache_start = start
+            if rescan:
+                previous = previous_cache[col_pos]
+                if func is not None and previous is not None and previous[0] == 0 and previous[2] is not None and \
+                        len(previous[2]) == start:
+                    old_values = previous[2]  # the column function was already called for these rows
+                else:
+                    old_values = column[:start]
+                    old_values = old_values if func is None else list(map(func, old_values))
+                processed_values = old_values + list(processed_values)
+                cache_start = 0
+                self._stats_widths[col_pos] = 0
+
+            # getting max data length of the column - each cell can be multi-line.
+            # The cells are formatted a block of rows at a time, so the memory use does not depend on the number of
+            # rows. The unadjusted strings of the first block are kept in the render cache, so the output pass only
+            # needs to pad them. The processed values of a function column are kept as well, so the function is called
+            # once per cell
+            if int_array is not None and rescan:
+                int_array = self._as_numpy_int_array(column, 0, end)
+            col_max_data_len = 0
+            for block_start in range(0, len(processed_values), self.CELL_CACHE_ROWS):
+                block_end = block_start + self.CELL_CACHE_ROWS
+                block_str_lists = None
+                if int_array is not None:
+                    block_str_lists = self._numpy_int_str_lists(int_array[block_start:block_end], plan)
+                if block_str_lists is None:
+                    block_str_lists = list(map(plan.to_str_list, processed_values[block_start:block_end]))
+                if block_start == 0:
+                    self._cell_cache[col_pos] = (cache_start, block_str_lists,
+                                                 None if func is None else processed_values)
+                block_str = (s for single_cell_list in block_str_lists for s in single_cell_list)
+                if plan.adjust == 'compact':
+                    col_max_data_len = max(col_max_data_len, max((len(s.strip()) for s in block_str), default=0))
+                else:
+                    col_max_data_len = max(col_max_data_len, max((len(s) for s in block_str), default=0))
+            self._stats_widths[col_pos] = max(self._stats_widths[col_pos], col_max_data_len)
+            self.col_widths[col_pos] = max(col_header_lens[col_pos], self._stats_widths[col_pos], self.value_min_len)
+            plan.wrapped_cells, plan.truncated_cells = fitted_cells
+            plan.set_width(self.col_widths[col_pos])
+            header_plans[col_pos].set_width(self.col_widths[col_pos])
+
+        self._stats_rows = self.total_lines
+
+    @staticmethod
+    def _get_left_right_digits(n: numbers.Number) -> Tuple[int, int]:
+        if n is None:
+            return 0, 0
+        as_string = str(n)
+        dot_pos = as_string.find('.')
+        if dot_pos == -1:
+            return len(as_string), 0
+        else:
+            return len(as_string[:dot_pos]), len(as_string[dot_pos + 1:])
+
+    def _get_header_lens(self) -> List[int]:
+        """The length of each column name, taking into account multi-line headers (zero for hidden columns).
+
+        Called before the column attributes are known, so they are kept between renders until the column names or
+        their formatting change"""
+        key = (self._plans_signature, tuple(self.col_names))
+        if self._header_lens_cache is None or self._header_lens_cache[0] != key:
+            header_lens = list(0 if hidden else max(len(col_name_line)
+                                                    for col_name_line in self._col_name_as_str_list(col_pos))
+                               for col_pos, hidden in enumerate(self.col_hidden))
+            self._header_lens_cache = (key, header_lens)
+        return list(self._header_lens_cache[1])
+
+    def _set_columns_attributes(self, is_numeric: List[bool], digits_left: List[int], digits_right: List[int],
+                                widths: List[int]) -> None:
+        """Set the column attributes of a render, which were computed elsewhere (see render())"""
+        self._col_widths_pending = False
+        self.col_is_numeric = list(is_numeric)
+        self.col_digits_left = list(digits_left)
+        self.col_digits_right = list(digits_right)
+        self.col_widths = list(widths)
+        plans, header_plans = self._get_plans()
+        for col_pos in self._visible_cols:
+            for plan in (plans[col_pos], header_plans[col_pos]):
+                plan.set_digits(is_numeric[col_pos], digits_left[col_pos], digits_right[col_pos])
+                plan.set_width(widths[col_pos])
+
+    @staticmethod
+    def _as_python_values(values: Sequence[Any]) -> Sequence[Any]:
+        """Bulk-convert an int / float64 numpy array to Python scalars, which are much faster to format"""
+        if np is not None and isinstance(values, np.ndarray) and \
+                (values.dtype.kind in 'iu' or values.dtype == np.float64):
+            return values.tolist()
+        return values
+
+    @staticmethod
+    def _has_builtin_number_format(column: Sequence[Any], plan: _ColumnPlan) -> bool:
+        """Whether the values of a typed compact column, a numeric numpy array or a list of ints are formatted as
+        numbers by the built-in formatting, which the vectorized paths implement (see register_formatter())"""
+        if not plan.formatters:
+            return True
+        if type(column) is CompactColumn:
+            samples = [0.0 if column.typecode == 'd' else 0]
+        elif np is not None and isinstance(column, np.ndarray) and column.dtype.kind in 'iuf':
+            sample = column.dtype.type(0)
+            samples = [sample, sample.item()]  # the values may be formatted as Python scalars, see _as_python_values()
+        else:
+            samples = [0]
+        return all(map(plan.is_number, samples))
+
+    def _as_numpy_int_array(self, column: Sequence[Any], start: int, end: int) -> Optional['np.ndarray']:
+        """The column values in [start, end) as a numpy int array - if numpy is installed and all the values are ints"""
+        if np is None or end - start < max(self.NUMPY_MIN_ROWS, 1):
+            return None
+        if isinstance(column, np.ndarray):
+            values = column[start:end]
+        elif type(column) is CompactColumn:
+            if column.typecode != 'q' or column.has_nulls:
+                return None
+            values = np.frombuffer(column.values[start:end], dtype=np.int64)
+        elif type(column) is list and set(map(type, itertools.islice(column, start, end))) == {int}:
+            values = np.array(column[start:end])  # ints beyond 64 bits result in an object array
+        else:
+            return None
+        return values if values.dtype.kind in 'iu' else None
 
-            # getting max data length of the column - each cell can be multi-line
-            all_cells_str_lists = (self._value_as_str_list(col_pos, value) for value in self.columns[col_pos])
-            all_col_str = (s for single_cell_list in all_cells_str_lists for s in single_cell_list)
-            col_max_data_len = max(len(s) for s in all_col_str)
-            self.col_widths[col_pos] = max(col_header_len, col_max_data_len)
+    @staticmethod
+    def _numpy_int_str_lists(values: 'np.ndarray', plan: _ColumnPlan) -> Optional[List[List[str]]]:
+        """Vectorized version of plan.to_str_list() for a numeric column of ints.
+
+        Returns None if the output may differ from the pure-Python path, which should be used instead."""
+        if plan.compact_number:
+            strings = values.astype(str)
+        else:
+            # f'{n:.0f}' formats an int through a float, which is identical to str(n) only up to 2**53
+            if plan.number_format != '.0f' or max(abs(int(values.min())), abs(int(values.max()))) >= 2 ** 53:
+                return None
+            strings = np.char.rjust(values.astype(str), plan.number_len)
+        if int(np.char.str_len(strings).max()) > plan.max_len:
+            return None  # the values should be wrapped or truncated
+        return list([s] for s in strings.tolist())
 
     def _get_value_sep(self) -> str:
         """ computes the separator string between cells, for example '  |  ' """
@@ -411,74 +2203,8 @@ class NiceTable:
         """ computes the separator of elements for a separator line, for example '--+--' """
         return f'{self.sep_horizontal * self.cell_spacing}{self.sep_cross}{self.sep_horizontal * self.cell_spacing}'
 
-    def _value_to_str_list(self, value: Any, pos: int, compact_number_required: bool, is_header: bool) -> List[str]:
-        """Convert a single value to a list of unadjusted strings"""
-        # 1. Apply any column-level lambda, if any
-        func = self.col_funcs[pos] or self.value_func
-        processed_value = value if func is None or is_header else func(value)
-
-        # 2. Format the value as a single string, including:
-        #       for numbers: auto adjust if asked - fixed number of fractional digits and left-padding with spaces
-        #       for non-numbers: escaping the sep_vertical character by policy
-        if isinstance(processed_value, numbers.Number):
-            if compact_number_required:
-                single_line_str = str(processed_value)
-            else:
-                value_length = self.col_digits_left[pos] + self.col_digits_right[pos] + 1
-                single_line_str = f'{processed_value:.{self.col_digits_right[pos]}f}'.rjust(value_length)
-        else:
-            if processed_value is None:
-                single_line_str = self.col_none_string[pos] or self.value_none_string
-            elif self.value_escape_type == 'remove':
-                single_line_str = str(processed_value).replace(self.sep_vertical, '')
-            elif self.value_escape_type == 'replace':
-                single_line_str = str(processed_value).replace(self.sep_vertical, self.value_escape_char)
-            elif self.value_escape_type == 'prefix':
-                single_line_str = str(processed_value).replace(self.sep_vertical,
-                                                               self.value_escape_char + self.sep_vertical)
-            else:  # 'ignore'
-                single_line_str = str(processed_value)
-
-        # 3. Handle newlines in single_line_Str - transform it to a list of one or more lines
-        newline_replace = self.col_newline_replace[pos] or self.value_newline_replace
-        if newline_replace is None:
-            str_list = single_line_str.split('\n')
-        else:
-            str_list = [single_line_str.replace('\n', newline_replace)]
-
-        # 4. Handle long output lines based on the table policy (may split or truncate long lines)
-        final_str_list = []
-        max_len = self.col_max_len[pos] or self.value_max_len
-        for s in str_list:
-            if len(s) <= max_len:
-                final_str_list.append(s)
-            elif self.value_too_long_policy == 'truncate':
-                final_str_list.append(s[:max_len])
-            else:  # wrap long value
-                final_str_list += [s[i:i+max_len] for i in range(0, len(s), max_len)]
-        return final_str_list
-
-    def _to_cell_str_list(self, value: Optional[Any], adjust: str, pos: int, is_header: bool) -> List[str]:
-        """Get a string representation of a value (List[str] to support multi-line) and apply cell adjustment to it"""
-        compact_number_required = adjust.startswith('strict') or adjust == 'compact'
-        str_list = self._value_to_str_list(value, pos, compact_number_required, is_header)
-
-        col_len = max(self.col_widths[pos], self.value_min_len)
-        if adjust in ['right', 'strict_right'] or (adjust == 'auto' and self.col_is_numeric[pos]):
-            adjusted_str_list = list(value.rjust(col_len) for value in str_list)
-        elif adjust in ['center', 'strict_center']:
-            adjusted_str_list = list(value.center(col_len) for value in str_list)
-        elif adjust in ['left', 'strict_left', 'auto']:
-            adjusted_str_list = list(value.ljust(col_len) for value in str_list)
-        else:  # compact
-            adjusted_str_list = list(value.strip().ljust(self.value_min_len) for value in str_list)
-        return adjusted_str_list
-
     def _col_name_as_str_list(self, pos: int) -> List[str]:
-        return self._to_cell_str_list(self.col_names[pos], self.header_adjust, pos, True)
-
-    def _value_as_str_list(self, pos: int, value: Any) -> List[str]:
-        return self._to_cell_str_list(value, self.col_adjust[pos] or self.cell_adjust, pos, False)
+        return self._header_plans[pos].cell_str_list(self.col_names[pos])
 
     def _wrap_line_with_borders(self, line: str) -> str:
         left_border = f'{self.sep_vertical}{" " * self.cell_spacing}' if self.border_left else ''
@@ -488,43 +2214,84 @@ class NiceTable:
     def _generate_header_lines(self) -> List[str]:
         """Generate header lines as a list of strings (to support multi-line headers)"""
         formatted_header_elements = []
-        for i in range(len(self.col_names)):
+        for i in self._visible_cols:
             formatted_header_elements.append(self._col_name_as_str_list(i))
         return self._generate_output_lines_elements(formatted_header_elements)
 
-    def _generate_sepline(self) -> str:
-        """Generate a separator line"""
+    def _generate_sepline(self, header_cells: Optional[List[List[str]]] = None) -> str:
+        """Generate a separator line, from the header cells of the visible columns if they were already formatted"""
+        if header_cells is None:
+            header_cells = list(self._col_name_as_str_list(i) for i in self._visible_cols)
         sep_elements = []
-        for i in range(len(self.col_names)):
+        for col_name_lines in header_cells:
             # computing column name length - taking into account multi-line headers
-            col_name_length = max(len(col_name_line) for col_name_line in self._col_name_as_str_list(i))
+            col_name_length = max(len(col_name_line) for col_name_line in col_name_lines)
             sep_elements.append(self.sep_horizontal * col_name_length)
         left_border = f'{self.sep_cross}{self.sep_horizontal * self.cell_spacing}' if self.border_left else ''
         right_border = f'{self.sep_horizontal * self.cell_spacing}{self.sep_cross}' if self.border_right else ''
         return left_border + self._get_sepline_sep().join(sep_elements) + right_border
 
-    def _generate_data_lines(self) -> List[str]:
-        """Generate data lines as list of lines"""
-        out = []
-        for line in range(self.total_lines):
+    def _iter_data_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Generate data lines of the rows in [start, end) one output line at a time"""
+        cell_cache = self._cell_cache or list(None for _ in range(self.total_cols))
+        plans = self._plans
+        visible_cols = self._visible_cols
+        for line in range(start, self.total_lines if end is None else end):
             # 1. get string representation of each cell: get a List[str] per cell as some can be multi-line
+            #    cells formatted during the width pass are only padded, the rest are formatted from scratch
             cell_output_list: List[List[str]] = []
-            for col in range(self.total_cols):
-                cell_output_list.append(self._value_as_str_list(col, self.columns[col][line]))
-            out += self._generate_output_lines_elements(cell_output_list)
-        return out
+            for col in visible_cols:
+                cache = cell_cache[col]
+                if cache is None or not 0 <= line - cache[0] < len(cache[2] or cache[1]):
+                    cell_output_list.append(plans[col].cell_str_list(self.columns[col][line]))
+                elif line - cache[0] < len(cache[1]):
+                    str_list = cache[1][line - cache[0]]
+                    if type(str_list) is not list:
+                        plans[col].count_fitted(str_list)
+                    cell_output_list.append(plans[col].pad(str_list))
+                else:
+                    cell_output_list.append(plans[col].pad(plans[col].to_str_list(cache[2][line - cache[0]])))
+            yield from self._generate_output_lines_elements(cell_output_list)
+
+    def _iter_compact_data_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Generate data lines of a table with no padding (see _is_compact()), a chunk of rows at a time"""
+        plans = list(self._plans[col_pos] for col_pos in self._visible_cols)
+        columns = list(self.columns[col_pos] for col_pos in self._visible_cols)
+        value_sep = self._get_value_sep()
+        has_borders = self.border_left or self.border_right
+        end = self.total_lines if end is None else end
+        for chunk_start in range(start, end, self.COMPACT_CHUNK_ROWS):
+            chunk_end = min(chunk_start + self.COMPACT_CHUNK_ROWS, end)
+            chunk_values = list(self._as_python_values(column[chunk_start:chunk_end]) if plan.func is None
+                                else list(map(plan.func, column[chunk_start:chunk_end]))
+                                for plan, column in zip(plans, columns))
+            chunk_strs = list(plan.compact_strs(values) for plan, values in zip(plans, chunk_values))
+            if all(strs is not None for strs in chunk_strs):
+                lines = map(value_sep.join, zip(*chunk_strs))
+                yield from map(self._wrap_line_with_borders, lines) if has_borders else lines
+            else:  # some cells are multi-line, the columns with no such cells are already formatted
+                chunk_str_lists = list(list([s] for s in strs) if strs is not None else
+                                       list(plan.pad(plan.to_str_list(value)) for value in values)
+                                       for plan, values, strs in zip(plans, chunk_values, chunk_strs))
+                for per_cell_list in zip(*chunk_str_lists):
+                    yield from self._generate_output_lines_elements(list(per_cell_list))
 
     def _generate_output_lines_elements(self, per_cell_list: List[List[str]]) -> List[str]:
-        """ Get a list of columns, each a list of string values (lines) and generate proper output lines from it"""
+        """ Get a list of the visible columns, each a list of string values (lines) and generate proper output lines
+        from it"""
         # 1. compute the number of output lines for this line, based on the longest multi-line cell
-        output_lines = max(len(cell_element) for cell_element in per_cell_list)
+        output_lines = max((len(cell_element) for cell_element in per_cell_list), default=1)
+        if output_lines > 1 and self._col_widths_pending:
+            # a compact render needs the column widths only to fill the missing lines of a multi-line row
+            self._compute_columns_attributes()
+            self._cell_cache = None
         # 2. build the output lines for this line - not all cells will have the same number of lines!
         out = []
         for out_line_num in range(output_lines):
             line_elements = []
-            for col in range(self.total_cols):
-                if out_line_num < len(per_cell_list[col]):
-                    line_elements.append(per_cell_list[col][out_line_num])
+            for cell_lines, col in zip(per_cell_list, self._visible_cols):
+                if out_line_num < len(cell_lines):
+                    line_elements.append(cell_lines[out_line_num])
                 else:
                     line_elements.append(' ' * self.col_widths[col])
             out.append(self._wrap_line_with_borders(self._get_value_sep().join(line_elements)))
@@ -537,21 +2304,10 @@ class NiceTable:
                         max_len: Optional[int] = None,
                         newline_replace: Optional[str] = None,
                         none_string: Optional[str] = None,
-                        func: Optional[Callable[[Any], Any]] = None) -> 'NiceTable':
+                        func: Optional[Callable[[Any], Any]] = None,
+                        hidden: Optional[bool] = None) -> 'NiceTable':
 
-        if isinstance(col, int):
-            if col < 0 or col >= self.total_cols:
-                raise IndexError("NiceTable.set_col_options(): " +
-                                 f'got col index {col}, expecting index in the range of "0..{self.total_cols -1}"')
-            col_pos = col
-        elif isinstance(col, str):
-            if col not in self.col_names:
-                raise IndexError("NiceTable.set_col_options(): " +
-                                 f'got col name "{col}", expecting one of {self.col_names}')
-            col_pos = self.col_names.index(col)
-        else:
-            raise TypeError('NiceTable.set_col_options(): '
-                            f'first parameter should be str or int (column name or position), got {type(col)}')
+        col_pos = self._get_col_pos(col, 'set_col_options')
 
         if adjust is not None:
             if adjust not in self.COLUMN_ADJUST_OPTIONS:
@@ -574,9 +2330,63 @@ class NiceTable:
                                 f"func parameter should be a function, got {type(func)}")
             self.col_funcs[col_pos] = func
 
+        if hidden is not None:
+            self.col_hidden[col_pos] = hidden
+
+        return self
+
+    def select(self, cols: List[Union[int, str]]) -> 'NiceTable':
+        """A view of some of the columns (by names or positions), in the given order - a table with the same settings,
+        which references the columns of this table instead of copying them. Only these columns are rendered, even if
+        they are hidden in this table."""
+        if not isinstance(cols, list):
+            raise TypeError(f'NiceTable.select(): expecting a list, got {type(cols)}')
+        col_positions = list(self._get_col_pos(col, 'select') for col in cols)
+        view = self._copy_for_render()
+        for col_attr in ('columns', 'col_names', 'col_adjust', 'col_max_len', 'col_newline_replace',
+                         'col_none_string', 'col_funcs'):
+            setattr(view, col_attr, list(getattr(self, col_attr)[col_pos] for col_pos in col_positions))
+        view.total_cols = len(col_positions)
+        view.col_hidden = list(False for _ in col_positions)
+        view._plans_signature = None  # the plans of this table are not shared with the view
+        view._read_only = True
+        view._reset_columns_stats()
+        return view
+
+    def _get_col_pos(self, col: Union[int, str], func_name: str, class_name: str = 'NiceTable') -> int:
+        """Resolve a column name or position to a column position, raising a clear error for the calling function"""
+        if isinstance(col, int):
+            if col < 0 or col >= self.total_cols:
+                raise IndexError(f"{class_name}.{func_name}(): " +
+                                 f'got col index {col}, expecting index in the range of "0..{self.total_cols -1}"')
+            return col
+        elif isinstance(col, str):
+            if col not in self.col_names:
+                raise IndexError(f"{class_name}.{func_name}(): " +
+                                 f'got col name "{col}", expecting one of {self.col_names}')
+            return self.col_names.index(col)
+        else:
+            raise TypeError(f'{class_name}.{func_name}(): '
+                            f'first parameter should be str or int (column name or position), got {type(col)}')
+
+    def set_col_storage(self, col: Union[int, str], storage: str) -> 'NiceTable':
+        """Declare how a column is stored: 'int' / 'float' as a compact array (see CompactColumn), or 'list'."""
+        col_pos = self._get_col_pos(col, 'set_col_storage')
+        if storage not in self.COLUMN_STORAGE_OPTIONS:
+            raise ValueError('NiceTable.set_col_storage(): '
+                             f'got storage "{storage}", expecting one of {self.COLUMN_STORAGE_OPTIONS}')
+        if storage == 'list':
+            self.columns[col_pos] = list(self.columns[col_pos])
+        else:
+            column = CompactColumn(storage, self.columns[col_pos])
+            if column.demoted_list is not None:
+                raise TypeError(f'NiceTable.set_col_storage(): column "{self.col_names[col_pos]}" has values '
+                                f'that cannot be stored as {storage}')
+            self.columns[col_pos] = column
         return self
 
     def get_column(self, col: Union[int, str]) -> List[Any]:
+        """Return the column values - a list, or a CompactColumn for a column stored as an array"""
         if isinstance(col, str):
             return self.columns[self.col_names.index(col)]  # raises ValueError on bad input
         elif isinstance(col, int):
@@ -593,4 +2403,178 @@ class NiceTable:
             raise ValueError('NiceTable.rename_columns(): '
                    f'there are {len(self.col_names)} columns, but got a list of {len(col_names)} column names')
         self.col_names = col_names
-        return self
\ No newline at end of file
+        return self
+
+
+class TableTemplate:
+    """A factory of tables that share the same settings, see NiceTable.template().
+
+    The settings are validated once, by creating a prototype table, and new() copies them to each new table
+    instead of setting them one by one (and applying the layout) as the NiceTable constructor does."""
+
+    def __init__(self, table_class: type, layout: Optional[str], settings: Dict[str, Any]):
+        for name in ('data', 'col_names'):
+            if name in settings:
+                raise TypeError(f'NiceTable.template(): {name} is set per table, in new()')
+        self.table_class = table_class
+        prototype = table_class(layout=layout, col_names=['c001'], **settings)
+        self.compact_storage = prototype.compact_storage
+        self.max_rows = prototype.max_rows
+        self.incremental_stats = prototype.incremental_stats
+        setting_vars = {'_layout'}  # the settings that are properties are kept in a "_" variable
+        for setting in table_class.FORMATTING_SETTINGS:
+            setting_vars.update((setting[0], '_' + setting[0]))
+        self._settings = dict((name, value) for name, value in vars(prototype).items() if name in setting_vars)
+
+    def new(self, data: Optional[Union[List[List[Any]], List[Dict[str, Any]], List[Tuple]]] = None,
+            col_names: Optional[List[str]] = None) -> NiceTable:
+        """A new table with the settings of the template, the same as NiceTable(data, col_names=col_names, ...)"""
+        out = self.table_class.__new__(self.table_class)
+        out.__dict__.update(self._settings)
+        out._init_data_instance_vars(data, col_names, self.compact_storage, self.max_rows, self.incremental_stats)
+        return out
+
+
+class LiveTable:
+    """A NiceTable wrapper for dashboards that re-print a table periodically, when only a few cells change.
+
+    Cells are updated with update_cell() / update_row(), and refresh() returns only the output lines that changed
+    since the previous refresh(), so a curses / ANSI front-end can redraw just those lines.
+    Only the updated rows are formatted again, the other rows come from a per-row cache of rendered lines.
+    The column layout (widths and numeric alignment) is kept as long as the updated values fit in it - a wider
+    value triggers a full reflow, while columns do not shrink until reflow() is called."""
+
+    def __init__(self, table: NiceTable):
+        self.table = table
+        self._lines: Optional[List[str]] = None  # the output lines of the previous refresh()
+        self._row_lines: List[List[str]] = []  # the output lines of each row
+        self._row_offsets: List[int] = []  # the position of the first output line of each row
+        self._dirty_rows = set()
+        self._reflow_required = True
+        self._layout: Optional[Tuple[List[bool], List[int], List[int], List[int]]] = None
+        self._layout_state: Optional[Tuple] = None  # what else the rendered lines depend on
+
+    def update_cell(self, row: int, col: Union[int, str], value: Any) -> 'LiveTable':
+        self._check_row(row, 'update_cell')
+        self.table._check_writable('update_cell', 'LiveTable')
+        col_pos = self.table._get_col_pos(col, 'update_cell', 'LiveTable')
+        self._prepare_update()
+        self.table.columns[col_pos][row] = value
+        self._after_update(row)
+        return self
+
+    def update_row(self, row: int, values: Union[List[Any], Dict[str, Any], Tuple]) -> 'LiveTable':
+        """Replace the values of a row, the same way append() stores a row (missing values are set to None)"""
+        self._check_row(row, 'update_row')
+        table = self.table
+        table._check_writable('update_row', 'LiveTable')
+        if isinstance(values, dict):
+            values = list(values.get(col_name) for col_name in table.col_names)
+        elif not isinstance(values, (list, tuple)):
+            raise TypeError(f'LiveTable.update_row(): expecting a list / dict / tuple, got {type(values)}')
+        if len(values) > table.total_cols:
+            raise ValueError(f'LiveTable.update_row(): got a list of {len(values)} elements, '
+                             f'expecting up to {table.total_cols}')
+        self._prepare_update()
+        for col_pos, column in enumerate(table.columns):
+            column[row] = values[col_pos] if col_pos < len(values) else None
+        self._after_update(row)
+        return self
+
+    def _check_row(self, row: int, func_name: str) -> None:
+        if not 0 <= row < self.table.total_lines:
+            raise IndexError(f'LiveTable.{func_name}(): got row {row}, '
+                             f'expecting a row in the range of "0..{self.table.total_lines - 1}"')
+
+    def _prepare_update(self) -> None:
+        if self.table._array_columns:
+            self.table._array_columns_to_lists()  # numpy arrays would coerce (or reject) the new values
+
+    def _after_update(self, row: int) -> None:
+        if self.table.compact_storage:
+            self.table._unwrap_demoted_columns()
+        self.table._reset_columns_stats()  # in-place updates are not tracked by the incremental statistics
+        self._dirty_rows.add(row)
+
+    def reflow(self) -> 'LiveTable':
+        """Render all the rows again on the next refresh(), fitting the column layout to the current values"""
+        self._reflow_required = True
+        return self
+
+    def refresh(self) -> List[Tuple[int, Optional[str]]]:
+        """Return the output lines that changed since the previous refresh(), as (line number, line) pairs.
+
+        The first refresh() returns all lines. If the output got shorter, the removed lines are returned as None."""
+        table = self.table
+        layout_state = (table.total_lines, list(table.col_names), table._formatting_signature(),
+                        list(getattr(table, setting[0]) for setting in table.FORMATTING_SETTINGS))
+        if self._reflow_required or layout_state != self._layout_state:
+            return self._refresh_all(layout_state)
+
+        table._set_columns_attributes(*self._layout)
+        changes = []
+        for row in sorted(self._dirty_rows):
+            row_lines = self._render_row(row)
+            if row_lines is None or len(row_lines) != len(self._row_lines[row]):
+                return self._refresh_all(layout_state)  # the layout changed, or the following lines moved
+            self._row_lines[row] = row_lines
+            for line_num, line in enumerate(row_lines, self._row_offsets[row]):
+                if self._lines[line_num] != line:
+                    self._lines[line_num] = line
+                    changes.append((line_num, line))
+        self._dirty_rows.clear()
+        return changes
+
+    def _refresh_all(self, layout_state: Tuple) -> List[Tuple[int, Optional[str]]]:
+        table = self.table
+        table._drop_stale_columns_stats()
+        table._compute_columns_attributes()
+        try:
+            top_lines, bottom_lines = table._generate_frame_lines()
+            self._row_lines = list(list(table._iter_data_lines(row, row + 1)) for row in range(table.total_lines))
+        finally:
+            table._cell_cache = None
+        self._layout = (list(table.col_is_numeric), list(table.col_digits_left), list(table.col_digits_right),
+                        list(table.col_widths))
+        self._layout_state = layout_state
+        self._row_offsets = list(itertools.accumulate([len(top_lines)] + list(map(len, self._row_lines))))[:-1]
+        lines = top_lines + list(itertools.chain.from_iterable(self._row_lines)) + bottom_lines
+
+        old_lines = self._lines or []
+        changes = list((line_num, line) for line_num, line in enumerate(lines)
+                       if line_num >= len(old_lines) or old_lines[line_num] != line)
+        changes += list((line_num, None) for line_num in range(len(lines), len(old_lines)))
+        self._lines = lines
+        self._dirty_rows.clear()
+        self._reflow_required = False
+        return changes
+
+    def _render_row(self, row: int) -> Optional[List[str]]:
+        """The output lines of a row in the current layout, or None if some of its values do not fit in the layout"""
+        table = self.table
+        is_numeric, digits_left, digits_right, widths = self._layout
+        cells = []
+        for col_pos in table._visible_cols:
+            plan = table._plans[col_pos]
+            value = table.columns[col_pos][row]
+            processed_value = value if plan.func is None else plan.func(value)
+            if is_numeric[col_pos]:
+                if not (processed_value is None or plan.is_number(processed_value)):
+                    return None
+                value_digits_left, value_digits_right = table._get_left_right_digits(value)
+                if value_digits_left > digits_left[col_pos] or value_digits_right > digits_right[col_pos]:
+                    return None
+            str_list = plan.to_str_list(processed_value)
+            if plan.adjust == 'compact':
+                width = max(len(s.strip()) for s in str_list)
+            else:
+                width = max(len(s) for s in str_list)
+            if width > widths[col_pos]:
+                return None
+            cells.append(plan.pad(str_list))
+        return table._generate_output_lines_elements(cells)
+
+    def __str__(self) -> str:
+        if self._lines is None or self._dirty_rows or self._reflow_required:
+            self.refresh()
+        return '\n'.join(self._lines) + '\n'
@@ -1,7 +1,18 @@
-from unittest import TestCase
-from nicetable.nicetable import NiceTable
-from typing import List
+from unittest import TestCase, skipIf
+from nicetable.nicetable import NiceTable, CompactColumn, LiveTable, RingColumn
+from nicetable import nicetable as nicetable_module
+from typing import Any, Callable, List
+import asyncio
+from importlib.util import find_spec
+import csv
+import datetime
+import decimal
+import gzip
+import io
 import json
+import os
+import tempfile
+import tracemalloc
 import numbers
 
 
@@ -322,6 +333,28 @@ class LayoutOptions(TestCase):
                          data_line,
                          'ignoring the sep_vertical character in the value')
 
+    def test__value_escape_type__quote(self):
+        self.tbl.layout = 'csv'
+        self.tbl.value_escape_type = 'quote'
+        self.tbl.columns[1][0] = 'Grass, "Poison"\nand more'
+        self.assertEqual('Name,Type,Height(cm),Weight(kg)\n'
+                         'Bulbasaur,"Grass, ""Poison""\nand more",70,6.901\n'
+                         'Pikachu,Electric,40,6.1\n'
+                         'Mewtwo,Psychic,200,122\n',
+                         str(self.tbl),
+                         'quoting values with a separator, a quote or a newline, as in RFC 4180')
+        self.assertEqual(['Bulbasaur', 'Grass, "Poison"\nand more', '70', '6.901'],
+                         list(csv.reader(io.StringIO(str(self.tbl))))[1],
+                         'quoted output is parsed back by the csv module')
+        self.assertEqual('+------+---------+\n'
+                         '|  n   |  v      |\n'
+                         '+------+---------+\n'
+                         '|  "a  |  "x|y"  |\n'
+                         '|  b"  |         |\n'
+                         '+------+---------+\n',
+                         str(NiceTable([['a\nb', 'x|y']], col_names=['n', 'v'], value_escape_type='quote')),
+                         'a quoted multi-line value is printed in multiple lines, unless the cell is compact')
+
     def test__value_escape_char(self):
         pass  # covered by test__value_escape_type
 
@@ -456,6 +489,24 @@ class LayoutOptions(TestCase):
                          data_line,
                          'value_func should only apply to columns without column function')
 
+    def test__set_col_options__hidden(self):
+        self.tbl.set_col_options('Type', hidden=True).set_col_options(3, hidden=True)
+        self.assertEqual('+-------------+--------------+\n'
+                         '|  Name       |  Height(cm)  |\n'
+                         '+-------------+--------------+\n'
+                         '|  Bulbasaur  |          70  |\n'
+                         '|  Pikachu    |          40  |\n'
+                         '|  Mewtwo     |         200  |\n'
+                         '+-------------+--------------+\n',
+                         str(self.tbl),
+                         'hidden columns are not printed')
+        self.tbl.set_col_options('Type', func=lambda x: 1 / 0)
+        self.assertEqual(7, len(str(self.tbl).splitlines()), 'hidden columns are not formatted')
+        self.tbl.set_col_options('Type', hidden=False, func=str.lower)
+        self.assertEqual('|  Bulbasaur  |  grass/poison  |          70  |',
+                         str(self.tbl).splitlines()[3],
+                         'a column can be shown again')
+
 
 class Layouts(TestCase):
     # TODO add tests for each layout
@@ -472,6 +523,24 @@ class Layouts(TestCase):
         # print('simple\n' + str(self.simple_tbl))
         # print('complex\n' + str(self.complex_tbl))
 
+    def test__csv_layout(self):
+        self.simple_tbl.layout = 'csv'
+        self.assertEqual('Name,Type,Height(cm),Weight(kg)\n'
+                         'Bulbasaur,Grass/Poison,70,6.901\n'
+                         'Pikachu,Electric,40,6.1\n'
+                         'Mewtwo,Psychic,200,122\n',
+                         str(self.simple_tbl),
+                         'csv layout rows are not padded')
+        self.complex_tbl.layout = 'csv'
+        self.assertEqual('Name,None,Height,Weight\n'
+                         '         ,       ,(cm),(kg)\n'
+                         'Bulbasaur,Grass,70,6.901\n'
+                         '         ,Poison,      ,      \n'
+                         'Pikachu,None,None,6.1\n'
+                         'Mewtwo,Psychic,200,122\n',
+                         str(self.complex_tbl),
+                         'csv layout fills the missing lines of multi-line cells with spaces')
+
     def test__get_column(self):
         self.assertEqual([6.901, 6.1, 122],
                          self.simple_tbl.get_column(3),
@@ -632,6 +701,27 @@ class DataManipulations(TestCase):
                          str(out2),
                          'initializing NiceTable with a list of lists is the same as appending each list in a loop')
 
+    def test__template(self):
+        template = NiceTable.template(layout='csv', value_none_string='N/A')
+        records = json.loads(NiceTable.SAMPLE_JSON)
+        for record in records:
+            self.assertEqual(str(NiceTable([record], layout='csv', value_none_string='N/A')),
+                             str(template.new([record])),
+                             'a table of a template is the same as a table created with the same settings')
+        out = template.new(col_names=['Name', 'Type'])
+        out.append(['Pikachu', None])
+        out.sep_vertical = ';'
+        self.assertEqual('Name;Type\nPikachu;N/A\n', str(out), 'tables of a template can be changed independently')
+        self.assertEqual('Name,Type\n', str(template.new(col_names=['Name', 'Type'])),
+                         'changing a table does not change its template')
+
+        with self.assertRaises(ValueError) as context:
+            NiceTable.template(layout='winter_columns')
+        self.assertEqual('Unknown table layout "winter_columns", '
+                         "should be one of ['csv', 'default', 'grep', 'md', 'tsv']",
+                         str(context.exception),
+                         'the settings are validated once, by template()')
+
     def test__constructor__col_names_and_data__list_of_dict(self):
         out1 = NiceTable(json.loads(NiceTable.SAMPLE_JSON), col_names=['id', 'name', 'type', 'height', 'weight'])
         out2 = NiceTable(col_names=['id', 'name', 'type', 'height', 'weight'])
@@ -683,6 +773,812 @@ class DataManipulations(TestCase):
                          'Correctly applying new column names')
 
 
+    def test__extend(self):
+        rows = [[1, 2, 3], ('apple', 'banana'), [], [None, 'x', 7.5]]
+        out1 = NiceTable(col_names=['a', 'b', 'c', 'd']).extend(rows)
+        out2 = NiceTable(col_names=['a', 'b', 'c', 'd'])
+        for row in rows:
+            out2.append(row)
+        self.assertEqual(str(out2), str(out1), 'extend() is the same as appending each row in a loop')
+        self.assertEqual(4, out1.total_lines, 'extend() updates the number of lines')
+
+        dicts = json.loads(NiceTable.SAMPLE_JSON)
+        out1 = NiceTable(col_names=['name', 'height', 'color']).extend(dicts)
+        out2 = NiceTable(col_names=['name', 'height', 'color'])
+        for row in dicts:
+            out2.append(row)
+        self.assertEqual(str(out2), str(out1), 'extend() with dicts is the same as appending each dict in a loop')
+
+        out1 = NiceTable(col_names=['a', 'b']).extend(iter([[1, 2], None, {'b': 3}]))
+        self.assertEqual([[1, None, None], [2, None, 3]], out1.columns, 'a mixed batch falls back to append()')
+
+        out1 = NiceTable(col_names=['a', 'b']).extend([(1, 2), (3, 4)], trusted=True)
+        self.assertEqual([[1, 3], [2, 4]], out1.columns, 'trusted rows are transposed as-is')
+
+        with self.assertRaises(ValueError) as context:
+            NiceTable(col_names=['a', 'b']).extend([[1, 2], [1, 2, 3]])
+        self.assertEqual('NiceTable.extend(): got a list of 3 elements, expecting up to 2',
+                         str(context.exception),
+                         'extend() validates the row length')
+
+    def test__append_columns(self):
+        names = ['Bulbasaur', 'Pikachu', 'Mewtwo']
+        out = NiceTable.from_columns({'Name': names, 'Weight(kg)': (6.901, 6.1, 122)})
+        self.assertIs(names, out.get_column('Name'), 'a list is used as the column storage without copying')
+        self.assertEqual([6.901, 6.1, 122], out.get_column(1), 'a tuple is copied into a list')
+        self.assertEqual(3, out.total_lines, 'from_columns() sets the number of lines')
+
+        out.append_columns({'Weight(kg)': [460]})
+        self.assertEqual(['Bulbasaur', 'Pikachu', 'Mewtwo', None],
+                         out.get_column('Name'),
+                         'missing columns are filled with None')
+        self.assertIn('|  None       |     460.000  |', str(out), 'appended columns are printed')
+
+        with self.assertRaises(ValueError) as context:
+            out.append_columns({'Name': ['Snorlax'], 'Type': ['Normal']})
+        self.assertTrue(str(context.exception).startswith(
+            "NiceTable.append_columns(): got unknown column names ['Type']"),
+            'append_columns() validates the column names')
+
+        with self.assertRaises(ValueError) as context:
+            out.append_columns({'Name': ['Snorlax'], 'Weight(kg)': []})
+        self.assertEqual('NiceTable.append_columns(): all columns should have the same length, got lengths [0, 1]',
+                         str(context.exception),
+                         'append_columns() validates the column lengths')
+
+    def test__compact_storage(self):
+        rows = [[1, 6.901, 'Bulbasaur'], [None, 6.1, 'Pikachu'], [150, None, None]]
+        out1 = NiceTable(rows, col_names=['id', 'weight', 'name'], compact_storage=True)
+        out2 = NiceTable(rows, col_names=['id', 'weight', 'name'])
+        self.assertEqual(str(out2), str(out1), 'compact storage prints the same as list storage')
+        self.assertEqual(['q', 'd'],
+                         list(column.typecode for column in out1.columns[:2]),
+                         'int and float columns are detected and stored as arrays')
+        self.assertIsInstance(out1.get_column('name'), list, 'other columns stay as lists')
+        self.assertEqual([1, None, 150], out1.get_column('id'), 'None values are kept in the null bitmap')
+
+        out1.append([2 ** 70, 122, 'Mewtwo'])
+        self.assertEqual([list, list],
+                         list(type(column) for column in out1.columns[:2]),
+                         'values that do not fit the array turn the column back into a list')
+        self.assertEqual([1, None, 150, 2 ** 70], out1.get_column('id'), 'no values are lost when demoting')
+
+        ids, weights = [1, None, 150], [6.901, 6.1, None]
+        out3 = NiceTable.from_columns({'id': ids, 'weight': weights, 'name': ['Bulbasaur', 'Pikachu', None]},
+                                      compact_storage=True)
+        self.assertEqual(str(out2), str(out3), 'columns appended to an empty compact table print the same')
+        self.assertEqual(['q', 'd'], list(column.typecode for column in out3.columns[:2]),
+                         'and are stored as arrays, like appended rows')
+        out3.append([2, 9.0, 'Ivysaur'])
+        self.assertEqual([1, None, 150], ids, "appending rows does not change the caller's lists")
+
+    def test__compact_column_updates(self):
+        column = CompactColumn(values=[1, None, 150, 25])
+        values = column.values
+        column[1] = 7
+        column[-1] = None
+        column[0] = None
+        self.assertIs(values, column.values, 'values that fit are set in place, without rebuilding the array')
+        self.assertEqual([None, 7, 150, None], column, 'the null bitmap follows the updates')
+        column.insert(1, 40)
+        del column[0]
+        self.assertEqual([40, 7, 150, None], column, 'insert and delete keep the nulls of the other rows')
+        del column[-1]
+        column.insert(0, 1)
+        self.assertEqual(([1, 40, 7, 150], False), (column, column.has_nulls), 'and of rows without nulls')
+
+        column[2] = 'Pikachu'
+        self.assertEqual(([1, 40, 'Pikachu', 150], None), (column, column.typecode),
+                         'a value that does not fit demotes the column')
+        with self.assertRaises(IndexError):
+            CompactColumn(values=[1])[1] = 2
+
+    def test__set_col_storage(self):
+        out = NiceTable([[1, 'a'], [2.5, 'b']], col_names=['weight', 'name'])
+        out.set_col_storage('weight', 'float')
+        self.assertIsInstance(out.get_column(0), CompactColumn, 'a column can be declared as compact')
+        self.assertEqual([1.0, 2.5], out.get_column(0), 'a declared float column converts ints to floats')
+
+        with self.assertRaises(TypeError) as context:
+            out.set_col_storage(1, 'int')
+        self.assertEqual('NiceTable.set_col_storage(): column "name" has values that cannot be stored as int',
+                         str(context.exception),
+                         'declaring a column type that does not fit the data raises')
+
+        with self.assertRaises(ValueError) as context:
+            out.set_col_storage(1, 'str')
+        self.assertTrue(str(context.exception).startswith('NiceTable.set_col_storage(): got storage "str"'),
+                        'unknown storage raises with clear error')
+
+    @skipIf(find_spec('pandas') is None, 'pandas is not installed')
+    def test__from_dataframe(self):
+        import pandas as pd
+        df = pd.DataFrame(json.loads(NiceTable.SAMPLE_JSON)).set_index('id')
+        df.loc['151'] = ['Mew', None, 40, float('nan')]
+        out = NiceTable.from_dataframe(df, index=True)
+        expected_out = \
+            '+-------+-------------+----------------+----------+-----------+\n' + \
+            '|  id   |  name       |  type          |  height  |  weight   |\n' + \
+            '+-------+-------------+----------------+----------+-----------+\n' + \
+            '|  001  |  Bulbasaur  |  Grass/Poison  |      70  |    6.901  |\n' + \
+            '|  025  |  Pikachu    |  Electric      |      40  |    6.100  |\n' + \
+            '|  150  |  Mewtwo     |  Psychic       |     200  |  122.000  |\n' + \
+            '|  151  |  Mew        |  None          |      40  |      nan  |\n' + \
+            '+-------+-------------+----------------+----------+-----------+\n'
+        self.assertEqual(expected_out, str(out), 'DataFrame columns (and index) are printed as a table')
+        self.assertTrue(nicetable_module.np.shares_memory(df['height'].to_numpy(), out.get_column('height')),
+                        'numeric columns reference the DataFrame data, without copying it')
+
+        out.append(['152', 'Chikorita', 'Grass', 90, 6.4])
+        self.assertEqual([70, 40, 200, 40, 90], out.get_column('height'), 'appending converts the arrays to lists')
+
+    @skipIf(find_spec('pandas') is None, 'pandas is not installed')
+    def test__from_dataframe__dtypes(self):
+        import pandas as pd
+        df = pd.DataFrame({'name': ['Bulbasaur', 'Pikachu'],
+                           'caught': pd.to_datetime(['1996-02-27 00:00', '1999-06-16 10:30']),
+                           'legendary': [False, True],
+                           'level': pd.Series([5, 25], dtype='int8'),
+                           'weight': [6.901, 6.1]})
+        rows = list(list(row) for row in df.itertuples(index=False))
+        self.assertEqual(str(NiceTable(rows, col_names=list(df.columns))),
+                         str(NiceTable.from_dataframe(df)),
+                         'columns of all dtypes print the same as the rows of the DataFrame')
+
+    def test__max_rows(self):
+        out = NiceTable(col_names=['Name', 'Weight(kg)'], max_rows=2)
+        out.append(['Snorlax (sleeping)', 460.25])
+        out.extend([['Bulbasaur', 6.901], ['Pikachu', 6.1]])
+        self.assertEqual(2, out.total_lines, 'the oldest rows are evicted')
+        self.assertEqual(['Bulbasaur', 'Pikachu'], out.get_column('Name'), 'the newest rows are kept')
+        self.assertEqual(RingColumn, type(out.get_column(0)), 'a full table stores its columns in ring buffers')
+        self.assertEqual('+-------------+--------------+\n'
+                         '|  Name       |  Weight(kg)  |\n'
+                         '+-------------+--------------+\n'
+                         '|  Bulbasaur  |       6.901  |\n'
+                         '|  Pikachu    |       6.100  |\n'
+                         '+-------------+--------------+\n',
+                         str(out),
+                         'the widths do not include the evicted rows')
+        out.append(['Mewtwo', 122])
+        self.assertIn('|  Pikachu  |         6.1  |\n|  Mewtwo   |       122.0  |', str(out),
+                      'appending evicts one row')
+
+        with self.assertRaises(ValueError) as context:
+            NiceTable(col_names=['Name'], max_rows=0)
+        self.assertEqual('NiceTable(): max_rows should be a positive number, got 0',
+                         str(context.exception),
+                         'a non-positive max_rows raises with clear error')
+
+    def test__head_tail(self):
+        out = NiceTable(col_names=['Name', 'Weight(kg)'])
+        for pokemon in json.loads(NiceTable.SAMPLE_JSON):
+            out.append([pokemon['name'], pokemon['weight']])
+        self.assertEqual(['Bulbasaur', 'Pikachu'], list(out.head(2).get_column(0)), 'head() has the first rows')
+        self.assertEqual(['Pikachu', 'Mewtwo'], list(out.tail(2).get_column(0)), 'tail() has the last rows')
+        self.assertEqual(['Pikachu'], list(out.tail(2).head(1).get_column(0)), 'views can be chained')
+        self.assertIs(out.get_column(0), out.tail(2).get_column(0).column, 'views do not copy the columns')
+        self.assertEqual('+-----------+--------------+\n'
+                         '|  Name     |  Weight(kg)  |\n'
+                         '+-----------+--------------+\n'
+                         '|  Pikachu  |         6.1  |\n'
+                         '|  Mewtwo   |       122.0  |\n'
+                         '+-----------+--------------+\n',
+                         str(out.tail(2)),
+                         'a view is rendered with widths of its own rows')
+
+        view = out.tail(2)
+        for mutate in (lambda: view.append(['Mew', 4.0]), lambda: view.extend([['Mew', 4.0]]),
+                       lambda: view.append_columns({'Name': ['Mew']}), lambda: out.select([0]).append(['Mew'])):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertEqual((2, 3, ['Pikachu', 'Mewtwo']), (view.total_lines, out.total_lines, list(view.get_column(0))),
+                         'views are read-only, and a rejected change leaves the view and its table as they were')
+        with self.assertRaises(TypeError) as context:
+            view.append(['Mew', 4.0])
+        self.assertEqual('NiceTable.append(): the table is a read-only view of another table '
+                         '(see tail() / select()), change the original table instead',
+                         str(context.exception),
+                         'changing a view raises with clear error')
+
+    def test__sorted_by_where(self):
+        out = NiceTable(col_names=['Name', 'Type', 'Weight(kg)'], compact_storage=True)
+        for pokemon in json.loads(NiceTable.SAMPLE_JSON):
+            out.append([pokemon['name'], pokemon['type'], pokemon['weight']])
+        out.append(['Missingno', None, None])
+        self.assertEqual(['Pikachu', 'Bulbasaur', 'Mewtwo', 'Missingno'],
+                         list(out.sorted_by('Weight(kg)').get_column(0)),
+                         'sorted_by() sorts a compact column, None values last')
+        self.assertEqual(['Mewtwo', 'Bulbasaur', 'Pikachu', 'Missingno'],
+                         list(out.sorted_by(2, reverse=True).get_column(0)),
+                         'sorted_by() can sort in reverse')
+        self.assertEqual(['Pikachu'],
+                         list(out.where({'Type': 'Electric'}).get_column(0)),
+                         'where() selects the rows by column values')
+        self.assertEqual(['Bulbasaur', 'Mewtwo'],
+                         list(out.where(lambda row: row['Weight(kg)'] is not None and row['Weight(kg)'] > 6.5)
+                              .sorted_by('Name').get_column(0)),
+                         'where() selects the rows by a function, and views can be chained')
+        self.assertEqual('+-----------+------------+--------------+\n'
+                         '|  Name     |  Type      |  Weight(kg)  |\n'
+                         '+-----------+------------+--------------+\n'
+                         '|  Mewtwo   |  Psychic   |       122.0  |\n'
+                         '|  Pikachu  |  Electric  |         6.1  |\n'
+                         '+-----------+------------+--------------+\n',
+                         str(out.where(lambda row: row['Name'] in ('Pikachu', 'Mewtwo')).sorted_by('Name')),
+                         'a view is rendered with widths of its own rows')
+
+        with self.assertRaises(TypeError) as context:
+            out.where('Type == "Electric"')
+        self.assertEqual("NiceTable.where(): expecting a function or a dict, got <class 'str'>",
+                         str(context.exception),
+                         'an unknown condition raises with clear error')
+
+    def test__select(self):
+        out = NiceTable(col_names=['Name', 'Type', 'Weight(kg)'])
+        for pokemon in json.loads(NiceTable.SAMPLE_JSON):
+            out.append([pokemon['name'], pokemon['type'], pokemon['weight']])
+        out.set_col_options('Name', adjust='right').set_col_options('Type', hidden=True)
+        self.assertEqual('+--------------+-------------+\n'
+                         '|  Weight(kg)  |  Name       |\n'
+                         '+--------------+-------------+\n'
+                         '|       6.901  |  Bulbasaur  |\n'
+                         '|       6.100  |    Pikachu  |\n'
+                         '|     122.000  |     Mewtwo  |\n'
+                         '+--------------+-------------+\n',
+                         str(out.select(['Weight(kg)', 0])),
+                         'select() renders the given columns in order, with their options')
+        self.assertEqual(['Type'], out.select(['Type']).col_names, 'a hidden column can be selected')
+        self.assertIs(out.get_column(0), out.select(['Name']).get_column(0), 'select() does not copy the columns')
+        with self.assertRaises(IndexError) as context:
+            out.select(['Height(cm)'])
+        self.assertEqual("NiceTable.select(): got col name \"Height(cm)\", expecting one of "
+                         "['Name', 'Type', 'Weight(kg)']",
+                         str(context.exception),
+                         'selecting a missing column raises with clear error')
+
+    def test__from_cursor(self):
+        import sqlite3
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE pokemon (id TEXT, name TEXT, type TEXT, height INT, weight REAL)')
+        conn.executemany('INSERT INTO pokemon VALUES (:id, :name, :type, :height, :weight)',
+                         json.loads(NiceTable.SAMPLE_JSON) * 100)
+        query = 'SELECT name, type, height, weight FROM pokemon ORDER BY id'
+        out1 = NiceTable.from_cursor(conn.execute(query), batch_size=7)
+        out2 = NiceTable(conn.execute(query).fetchall(), col_names=['name', 'type', 'height', 'weight'])
+        self.assertEqual(str(out2), str(out1), 'fetching in batches is the same as passing fetchall() output')
+        self.assertEqual(300, out1.total_lines, 'all rows are fetched')
+
+        conn.row_factory = lambda cursor, row: dict(zip(list(column[0] for column in cursor.description), row))
+        self.assertEqual(str(out2), str(NiceTable.from_cursor(conn.execute(query), batch_size=7)),
+                         'cursors that return dicts, like DictCursor, are fetched as dict rows')
+        conn.row_factory = sqlite3.Row
+        self.assertEqual(str(out2), str(NiceTable.from_cursor(conn.execute(query))),
+                         'and cursors that return other sequences, like sqlite3.Row')
+        conn.row_factory = None
+
+        out = NiceTable.from_cursor(conn.execute('SELECT * FROM pokemon WHERE 1 = 0'), layout='csv')
+        self.assertEqual('id,name,type,height,weight\n', str(out), 'an empty result set prints the header')
+
+        with self.assertRaises(ValueError) as context:
+            NiceTable.from_cursor(conn.execute('DELETE FROM pokemon'))
+        self.assertEqual('NiceTable.from_cursor(): the cursor has no result set (cursor.description is None)',
+                         str(context.exception),
+                         'a cursor without a result set raises with clear error')
+
+
+class Rendering(TestCase):
+    """ Tests the rendering machinery behind str(), beyond the formatting options"""
+
+    def setUp(self):
+        self.tbl = NiceTable(col_names=['Name', 'Type', 'Height(cm)', 'Weight(kg)'])
+        for pokemon in json.loads(NiceTable.SAMPLE_JSON):
+            self.tbl.append([pokemon['name'], pokemon['type'], pokemon['height'], pokemon['weight']])
+
+    def test__iter_lines(self):
+        lines = self.tbl.iter_lines()
+        self.assertFalse(isinstance(lines, list),
+                         'iter_lines() should be a generator, not a pre-built list')
+        self.assertEqual(str(self.tbl).splitlines(),
+                         list(lines),
+                         'iter_lines() yields the same lines as str(), without newlines')
+
+        self.tbl.columns[1][0] = 'Grass\nPoison'
+        self.tbl.layout = 'md'
+        self.assertEqual(str(self.tbl).splitlines(),
+                         list(self.tbl.iter_lines()),
+                         'iter_lines() also handles multi-line cells')
+
+
+    def test__render__parallel(self):
+        self.tbl.set_col_options('Type', func=str.upper)
+        self.tbl.columns[0][1] = 'Pika\nchu'
+        for i in range(10):
+            self.tbl.append([f'Pokemon #{i}', 'Normal', i * 1000, i / 8])
+        self.assertEqual(str(self.tbl), self.tbl.render(parallel=3), 'parallel rendering has the same output')
+
+        self.tbl.set_col_options('Type', func=lambda x: x.lower())
+        with self.assertWarns(RuntimeWarning):
+            out = self.tbl.render(parallel=3)
+        self.assertEqual(str(self.tbl), out, 'a lambda falls back to serial rendering')
+
+    def test__render_page(self):
+        self.tbl.append(['Snorlax', 'Normal', 210, 460.25])
+        self.assertEqual('+-------------+----------------+--------------+--------------+\n'
+                         '|  Name       |  Type          |  Height(cm)  |  Weight(kg)  |\n'
+                         '+-------------+----------------+--------------+--------------+\n'
+                         '|  Pikachu    |  Electric      |          40  |       6.100  |\n'
+                         '|  Mewtwo     |  Psychic       |         200  |     122.000  |\n'
+                         '+-------------+----------------+--------------+--------------+\n',
+                         self.tbl.render_page(1, 2),
+                         'a page is aligned to all the rows of the table')
+        self.assertEqual(str(self.tbl).splitlines()[-2:],
+                         self.tbl.render_page(3, 100).splitlines()[-2:],
+                         'the last page may be shorter')
+
+        pages = list(self.tbl.iter_pages(3))
+        self.assertEqual(2, len(pages), 'iter_pages() splits the rows into pages')
+        self.assertEqual(str(self.tbl).splitlines()[3:-1],
+                         pages[0].splitlines()[3:-1] + pages[1].splitlines()[3:-1],
+                         'the data lines of all pages are the data lines of the table')
+
+        scanned = []
+        self.tbl.set_col_options('Name', func=lambda name: scanned.append(name) or name)
+        first_page = self.tbl.render_page(0, 2)
+        self.assertEqual(4, len(scanned), 'the first page scans all the rows for the column widths')
+        scanned.clear()
+        self.assertEqual(first_page.splitlines()[:3], self.tbl.render_page(2, 2).splitlines()[:3],
+                         'the next pages have the same header')
+        self.assertEqual(['Mewtwo', 'Snorlax'], scanned, 'the next pages reuse the widths, and format only their rows')
+        scanned.clear()
+        self.tbl.append(['Charizard', 'Fire/Flying', 170, 90.5])
+        self.tbl.render_page(4, 1)
+        self.assertEqual(5, len(scanned), 'appending rows makes the next page scan all the rows again')
+
+    def test__aiter_lines(self):
+        in_flight = []
+
+        async def async_upper(x):
+            in_flight.append(x)
+            await asyncio.sleep(0.001)
+            self.assertLessEqual(len(in_flight), 2, 'at most max_concurrency calls are in flight')
+            in_flight.remove(x)
+            return x.upper()
+
+        async def collect_lines(tbl):
+            return list([line async for line in tbl.aiter_lines(yield_every=2, max_concurrency=2)])
+
+        expected_lines = list(self.tbl.set_col_options('Type', func=str.upper).iter_lines())
+        self.tbl.set_col_options('Type', func=async_upper)
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(expected_lines,
+                             loop.run_until_complete(collect_lines(self.tbl)),
+                             'aiter_lines() awaits coroutine column functions')
+        finally:
+            loop.close()
+        self.assertEqual(['Grass/Poison', 'Electric', 'Psychic'],
+                         self.tbl.get_column('Type'),
+                         'the awaited values are only used for rendering')
+
+        with self.assertRaises(TypeError) as context:
+            str(self.tbl)
+        self.assertEqual('NiceTable.iter_lines(): the function of column "Type" is a coroutine function, '
+                         'render the table with aiter_lines()',
+                         str(context.exception),
+                         'sync rendering with a coroutine function raises with clear error')
+
+    def test__render__stats(self):
+        self.assertIsNone(self.tbl.last_render_stats, 'stats are opt-in')
+        self.tbl.set_col_options('Type', func=str.upper, max_len=8)
+        self.assertEqual(str(self.tbl), self.tbl.render(stats=True), 'the output is the same with stats')
+        stats = self.tbl.last_render_stats
+        self.assertEqual((3, 4, 3, 1, 0),
+                         (stats['rows'], stats['columns'], stats['func_calls'], stats['cells_wrapped'],
+                          stats['cells_truncated']),
+                         'stats count the column function calls and the wrapped cells')
+        tbl = NiceTable(list([f'Pokemon number {i}', 'Grass/Poison'] for i in range(30)), col_names=['Name', 'Type'],
+                        value_max_len=12)
+        tbl.CELL_CACHE_ROWS = 8
+        for policy in ('wrap', 'truncate'):
+            tbl.value_too_long_policy = policy
+            for render_stats in (tbl.render(stats=True) and tbl.last_render_stats,
+                                 tbl.render(stats=True, progress=lambda *args: None, every_rows=7) and
+                                 tbl.last_render_stats):
+                self.assertEqual((30, 0) if policy == 'wrap' else (0, 30),
+                                 (render_stats['cells_wrapped'], render_stats['cells_truncated']),
+                                 'each cell is counted once, also beyond the rows formatted by the width pass')
+        self.assertEqual(len(str(self.tbl).encode('utf-8')), stats['output_bytes'], 'stats count the output bytes')
+        self.assertEqual(['column_attributes', 'header_and_borders', 'data_lines', 'join'],
+                         list(stats['phases']),
+                         'stats report the time of each phase of the render')
+
+        class MonitoredTable(NiceTable):
+            pass
+        exported = []
+        MonitoredTable.set_render_stats_hook(lambda render_stats: exported.append(render_stats['output_lines']))
+        str(MonitoredTable(col_names=['Name'], data=[['Pikachu'], ['Mewtwo']]))
+        self.assertEqual([6], exported, 'the stats hook is called on every render, including str()')
+        str(self.tbl)
+        self.assertEqual([6], exported, 'the stats hook is set per table class')
+
+    def test__render__budget(self):
+        progress = []
+        out = self.tbl.render(progress=lambda *args: progress.append(args), every_rows=2)
+        self.assertEqual(str(self.tbl), out, 'the output is the same with progress reports')
+        self.assertEqual([('scan', 2, 3), ('scan', 3, 3), ('output', 2, 3), ('output', 3, 3)],
+                         progress,
+                         'progress is reported every_rows rows, in both passes')
+        self.assertEqual('+-------------+----------------+\n'
+                         '|  Name       |  Type          |\n'
+                         '+-------------+----------------+\n'
+                         '|  Bulbasaur  |  Grass/Poison  |\n'
+                         '+-------------+----------------+\n'
+                         '... 2 more rows not shown (max_rows=1)\n',
+                         self.tbl.select(['Name', 'Type']).render(max_rows=1),
+                         'max_rows renders the first rows, with a footer of the rows left out')
+        progress.clear()
+        self.assertEqual('+-------------+----------------+\n'
+                         '|  Name       |  Type          |\n'
+                         '+-------------+----------------+\n'
+                         '|  Bulbasaur  |  Grass/Poison  |\n'
+                         '+-------------+----------------+\n'
+                         '... 2 more rows not shown (cancelled)\n',
+                         self.tbl.select(['Name', 'Type']).render(progress=lambda *args: progress.append(args) or False,
+                                                                  every_rows=1),
+                         'progress cancels the render by returning False, the rows scanned so far are rendered')
+        self.assertEqual([('scan', 1, 3)], progress, 'progress is not called after it cancels the render')
+        self.assertIn('... 1 more rows not shown (cancelled)\n',
+                      self.tbl.render(progress=lambda phase, done, rows: phase == 'scan' or done < 2, every_rows=1),
+                      'the render can be cancelled while the rows are output')
+        self.tbl.layout = 'csv'
+        self.assertEqual('Name,Type,Height(cm),Weight(kg)\n'
+                         '... 3 more rows not shown (max_seconds=0)\n',
+                         self.tbl.render(max_seconds=0),
+                         'output stops once max_seconds run out')
+
+        with self.assertRaises(ValueError) as context:
+            self.tbl.render(parallel=2, max_rows=1)
+        self.assertEqual('NiceTable.render(): progress, max_seconds and max_rows do not support parallel',
+                         str(context.exception),
+                         'budgets with parallel raise with clear error')
+
+    def test__write(self):
+        text_fp = io.StringIO()
+        self.tbl.write(text_fp, chunk_lines=2)
+        self.assertEqual(str(self.tbl), text_fp.getvalue(), 'write() output is the same as str()')
+
+        self.tbl.columns[0][0] = 'Bulbasaur\u00e9'
+        binary_fp = io.BytesIO()
+        self.tbl.write(binary_fp, encoding='latin-1')
+        self.assertEqual(str(self.tbl).encode('latin-1'), binary_fp.getvalue(), 'binary files get encoded chunks')
+
+        with self.assertRaises(ValueError) as context:
+            self.tbl.write(text_fp, chunk_lines=0)
+        self.assertEqual('NiceTable.write(): chunk_lines should be a positive number, got 0',
+                         str(context.exception),
+                         'a non-positive chunk_lines raises with clear error')
+
+    def test__to_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'pokemon.txt')
+            self.tbl.to_file(path)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(str(self.tbl), f.read(), 'to_file() writes the same output as str()')
+
+            self.tbl.to_file(path + '.gz', compression='gzip')
+            with gzip.open(path + '.gz', 'rt', encoding='utf-8') as f:
+                self.assertEqual(str(self.tbl), f.read(), 'to_file() can compress the output')
+
+        with self.assertRaises(ValueError) as context:
+            self.tbl.to_file('pokemon.zip', compression='zip')
+        self.assertEqual('NiceTable.to_file(): got compression "zip", '
+                         "expecting one of ['gzip', 'bz2', 'lzma'] or None",
+                         str(context.exception),
+                         'an unknown compression raises with clear error')
+
+    def test__to_file__mmap(self):
+        self.tbl.append(['Flabébé', 'Fairy\n(Flower)', 10, 0.1])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'pokemon.txt')
+            for layout in ('default', 'md', 'csv'):
+                self.tbl.layout = layout
+                self.tbl.to_file(path, mmap=True, parallel=2)
+                with open(path, encoding='utf-8') as f:
+                    self.assertEqual(str(self.tbl), f.read(), f'worker processes write their rows at their offsets, '
+                                                              f'for multi-line and non-ASCII values, layout {layout}')
+            self.tbl.to_file(path, mmap=True)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(str(self.tbl), f.read(), 'without parallel, the rows are written by write()')
+
+        with self.assertRaises(ValueError) as context:
+            self.tbl.to_file('pokemon.txt', encoding='utf-16', mmap=True)
+        self.assertEqual('NiceTable.to_file(): mmap=True expects an ASCII-compatible encoding, got utf-16',
+                         str(context.exception),
+                         'an encoding with multi-byte ASCII characters raises with clear error')
+
+    def test__live_table(self):
+        live = LiveTable(self.tbl)
+        self.assertEqual(list(enumerate(str(self.tbl).splitlines())),
+                         live.refresh(),
+                         'the first refresh() returns all lines')
+        self.assertEqual([], live.refresh(), 'nothing changed')
+
+        live.update_cell(1, 'Weight(kg)', 6.2).update_row(2, {'Name': 'Mew', 'Type': 'Psychic'})
+        self.assertEqual([(4, '|  Pikachu    |  Electric      |          40  |       6.200  |'),
+                          (5, '|  Mew        |  Psychic       |        None  |        None  |')],
+                         live.refresh(),
+                         'refresh() returns only the changed lines')
+
+        live.update_cell(0, 0, 'Bulbasaur the Great')
+        self.assertEqual(list(enumerate(str(self.tbl).splitlines())),
+                         live.refresh(),
+                         'a wider value reflows the table')
+        self.assertEqual(str(self.tbl), str(live), 'str() of a LiveTable is the current table')
+
+        with self.assertRaises(IndexError) as context:
+            live.update_cell(3, 0, 'Snorlax')
+        self.assertEqual('LiveTable.update_cell(): got row 3, expecting a row in the range of "0..2"',
+                         str(context.exception),
+                         'updating a missing row raises with clear error')
+
+    def test__value_func__called_once_per_cell(self):
+        calls = []
+
+        def counting_func(x):
+            calls.append(x)
+            return x
+
+        self.tbl.value_func = counting_func
+        str(self.tbl)
+        self.assertEqual(3 * 4,
+                         len(calls),
+                         'value_func should be called exactly once per cell in a single render')
+
+        calls.clear()
+        self.tbl.set_col_options('Type', func=lambda x: x.upper())
+        out = str(self.tbl)
+        self.assertEqual(3 * 3,
+                         len(calls),
+                         'value_func should not be called for a column with a column-level func')
+        self.assertIn('GRASS/POISON', out, 'the column-level func still applies')
+
+        tbl = NiceTable(list([f'Pokemon #{i}', i * 0.5 if i < 30 else i * 1000.25] for i in range(40)),
+                        col_names=['Name', 'Weight'], value_func=counting_func)
+        tbl.CELL_CACHE_ROWS = 8
+        for render in (str, lambda t: t.render(progress=lambda *args: None, every_rows=7)):
+            calls.clear()
+            self.assertEqual(str(NiceTable(list(zip(tbl.columns[0], tbl.columns[1])), col_names=['Name', 'Weight'])),
+                             render(tbl),
+                             'rows beyond the cached rows are formatted from the values processed in the width pass')
+            self.assertEqual(40 * 2, len(calls), 'also for rows beyond the cached rows, and for chunks that are '
+                                                 'scanned again when the numeric alignment changes')
+
+    def test__incremental_column_stats(self):
+        scanned = []
+
+        class Weight(float):
+            def __str__(self):
+                scanned.append(float(self))
+                return super().__str__()
+
+        tbl = NiceTable(col_names=['Name', 'Weight(kg)'], incremental_stats=True)
+        for pokemon in json.loads(NiceTable.SAMPLE_JSON):
+            tbl.append([pokemon['name'], Weight(pokemon['weight'])])
+        str(tbl)
+        self.assertEqual(3, len(scanned), 'first render scans all rows')
+
+        scanned.clear()
+        tbl.append(['Charmander', Weight(8.5)])
+        out = str(tbl)
+        self.assertEqual([8.5], scanned, 'a render after append() only scans the new rows')
+        self.assertIn('|  Charmander  |       8.500  |', out, 'new row is aligned with the older rows')
+
+        tbl.append(['Snorlax', Weight(460.25)])
+        expected_out = \
+            '+--------------+--------------+\n' + \
+            '|  Name        |  Weight(kg)  |\n' + \
+            '+--------------+--------------+\n' + \
+            '|  Bulbasaur   |       6.901  |\n' + \
+            '|  Pikachu     |       6.100  |\n' + \
+            '|  Mewtwo      |     122.000  |\n' + \
+            '|  Charmander  |       8.500  |\n' + \
+            '|  Snorlax     |     460.250  |\n' + \
+            '+--------------+--------------+\n'
+        self.assertEqual(expected_out, str(tbl), 'a wider number re-aligns the older rows')
+
+        scanned.clear()
+        tbl.set_col_options(1, max_len=5)
+        str(tbl)
+        self.assertEqual(5, len(scanned), 'changing a formatting setting rebuilds the statistics')
+
+        scanned.clear()
+        tbl.incremental_stats = False
+        str(tbl)
+        str(tbl)
+        self.assertEqual(10, len(scanned), 'without incremental_stats, every render scans all rows')
+
+    def test__edited_cells(self):
+        tbl = NiceTable([['a', 1], ['b', 2]], col_names=['n', 'v'])
+        str(tbl)
+        tbl.columns[0][0] = 'a much longer name'
+        tbl.columns[1][1] = 12345.5
+        self.assertEqual('+----------------------+-----------+\n'
+                         '|  n                   |  v        |\n'
+                         '+----------------------+-----------+\n'
+                         '|  a much longer name  |      1.0  |\n'
+                         '|  b                   |  12345.5  |\n'
+                         '+----------------------+-----------+\n',
+                         str(tbl),
+                         'cells edited in place after a render are scanned again by the next render')
+
+    def test__render_plans(self):
+        str(self.tbl)
+        plans = self.tbl._plans
+        self.tbl.append(['Charmander', 'Fire', 60, 8.5])
+        str(self.tbl)
+        self.assertIs(plans, self.tbl._plans, 'render plans are reused while the settings are unchanged')
+
+        self.tbl.set_col_options('Type', adjust='right', none_string='N/A')
+        self.tbl.append(['Missingno', None, None, None])
+        out = str(self.tbl)
+        self.assertIsNot(plans, self.tbl._plans, 'set_col_options() rebuilds the render plans')
+        self.assertIn('|  Missingno   |           N/A  |', out, 'the new column options are applied')
+
+        self.tbl.header_adjust = 'right'
+        self.assertIn('|        Name  |          Type  |', str(self.tbl), 'a new header_adjust is applied')
+
+    def test__header_cache(self):
+        str(self.tbl)
+        header_lines = self.tbl._frame_cache[1]
+        self.tbl.append(['Eevee', 'Normal', 30, 6.5])
+        str(self.tbl)
+        self.assertIs(header_lines, self.tbl._frame_cache[1], 'header lines are reused while the widths are unchanged')
+
+        self.tbl.rename_columns(['Name', 'Type', 'Height', 'Weight'])
+        self.assertEqual('|  Name       |  Type          |  Height  |  Weight   |',
+                         str(self.tbl).splitlines()[1],
+                         'rename_columns() generates the header lines again')
+        self.tbl.col_names[0] = 'Pokemon'
+        self.tbl.set_col_options('Type', adjust='right')
+        self.tbl.sep_horizontal = '='
+        self.assertEqual(['+=============+================+==========+===========+',
+                          '|  Pokemon    |  Type          |  Height  |  Weight   |'],
+                         str(self.tbl).splitlines()[:2],
+                         'changes of the column names and of the header settings generate the header lines again')
+
+    def test__render_memory(self):
+        def render_peak(rows: int, render: Callable[[NiceTable], Any]) -> int:
+            tbl = NiceTable(list([f'Pokemon #{i}', 'Grass/Poison', i % 250, i * 0.125] for i in range(rows)),
+                            col_names=['Name', 'Type', 'Height', 'Weight'])
+            tbl.CELL_CACHE_ROWS = 100
+            tbl.NUMPY_MIN_ROWS = rows + 1   # numpy arrays are one number per row, leave them out of the measurement
+            tracemalloc.start()
+            try:
+                render(tbl)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        def drain_lines(tbl: NiceTable) -> None:
+            for _ in tbl.iter_lines():
+                pass
+
+        render_peak(100, drain_lines)    # one-time allocations
+        small_peak = render_peak(2000, drain_lines)
+        self.assertLess(render_peak(8000, drain_lines), small_peak * 1.5,
+                        'a first render keeps a block of formatted cells, its peak memory does not grow with the rows')
+
+        def write_file(tbl: NiceTable) -> None:
+            tbl.to_file(os.devnull, chunk_lines=100)
+
+        render_peak(100, write_file)
+        small_peak = render_peak(2000, write_file)
+        self.assertLess(render_peak(8000, write_file), small_peak * 1.5,
+                        'nor does the peak memory of writing a table that was never rendered to a file')
+
+    def test__register_formatter(self):
+        class DateTable(NiceTable):
+            pass
+        DateTable.register_formatter(datetime.date, lambda d: d.strftime('%d/%m/%Y'))
+        DateTable.register_formatter(decimal.Decimal, lambda d: f'{d:,} $')
+        caught = DateTable(col_names=['Name', 'Caught', 'Price', 'Level'])
+        caught.append(['Pikachu', datetime.datetime(1996, 2, 27, 10, 30), decimal.Decimal(1500), 25])
+        caught.append(['Mewtwo', datetime.date(1996, 2, 27), decimal.Decimal('99.5'), None])
+        self.assertEqual('+-----------+--------------+-----------+---------+\n'
+                         '|  Name     |  Caught      |  Price    |  Level  |\n'
+                         '+-----------+--------------+-----------+---------+\n'
+                         '|  Pikachu  |  27/02/1996  |  1,500 $  |     25  |\n'
+                         '|  Mewtwo   |  27/02/1996  |  99.5 $   |   None  |\n'
+                         '+-----------+--------------+-----------+---------+\n',
+                         str(caught),
+                         'registered formatters apply to subclasses too, and their values are printed as text')
+        self.assertEqual({}, NiceTable.FORMATTERS, 'formatters registered on a subclass do not affect NiceTable')
+        self.assertIn("|  2020-01-01 00:00:00  |  b'Pika|chu'  |",
+                      str(NiceTable([[datetime.datetime(2020, 1, 1), b'Pika|chu']], value_escape_type='ignore')),
+                      'built-in formatters print dates and bytes as str() does')
+
+        with self.assertRaises(TypeError) as context:
+            DateTable.register_formatter('date', str)
+        self.assertEqual("NiceTable.register_formatter(): value_type parameter should be a type, got <class 'str'>",
+                         str(context.exception),
+                         'a value_type which is not a type raises with clear error')
+
+    @skipIf(nicetable_module.np is None, 'numpy is not installed')
+    def test__numpy_int_columns(self):
+        ids = [1, 25, 150, -7, 10 ** 12 + 7]
+        expected_out = \
+            '+------------------+------------------+-----------------+\n' + \
+            '|  list            |  compact         |  strict         |\n' + \
+            '+------------------+------------------+-----------------+\n' + \
+            '|               1  |               1  |  1              |\n' + \
+            '|              25  |              25  |  25             |\n' + \
+            '|             150  |             150  |  150            |\n' + \
+            '|              -7  |              -7  |  -7             |\n' + \
+            '|   1000000000007  |   1000000000007  |  1000000000007  |\n' + \
+            '+------------------+------------------+-----------------+\n'
+        tbl = NiceTable(list([n, n, n] for n in ids), col_names=['list', 'compact', 'strict'])
+        tbl.set_col_storage('compact', 'int').set_col_options('strict', adjust='strict_left')
+        tbl.NUMPY_MIN_ROWS = 1
+        self.assertEqual(expected_out, str(tbl), 'vectorized int formatting is the same as the pure-Python one')
+
+        tbl.append([8, 8, 8])
+        expected_lines = expected_out.splitlines()
+        expected_lines.insert(-1, '|               8  |               8  |  8              |')
+        self.assertEqual(expected_lines,
+                         str(tbl).splitlines(),
+                         'also when only the new rows are vectorized')
+
+    @skipIf(nicetable_module.np is None, 'numpy is not installed')
+    def test__register_formatter__vectorized_columns(self):
+        class HashTable(NiceTable):
+            pass
+        HashTable.register_formatter(int, lambda n: f'#{n}')
+        HashTable.register_formatter(float, lambda x: f'{x:.1e}')
+        expected_out = \
+            '+-------+-----------+\n' + \
+            '|  id   |  weight   |\n' + \
+            '+-------+-----------+\n' + \
+            '|  #1   |  6.9e+00  |\n' + \
+            '|  #25  |  6.1e+00  |\n' + \
+            '+-------+-----------+\n'
+        columns = {'id': [1, 25], 'weight': [6.901, 6.1]}
+        tables = {'lists': HashTable.from_columns(dict(columns)),
+                  'compact columns': HashTable.from_columns(dict(columns), compact_storage=True),
+                  'numpy arrays': HashTable.from_columns(dict((name, nicetable_module.np.array(values))
+                                                              for name, values in columns.items()))}
+        for storage, tbl in tables.items():
+            tbl.NUMPY_MIN_ROWS = 1
+            self.assertEqual(expected_out, str(tbl), f'registered formatters apply to numbers stored as {storage}')
+
+
+class Benchmarks(TestCase):
+    """ Tests the benchmark runner (python -m nicetable.bench), not the timings"""
+
+    def test__bench(self):
+        from nicetable import bench
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'bench.json')
+            self.assertEqual(0, bench.main(['--sizes', '10', '--repeat', '1', '--filter', 'ingest_extend',
+                                            '--output', path]),
+                             'a run without a baseline succeeds')
+            with open(path, encoding='utf-8') as f:
+                results = json.load(f)
+        self.assertEqual([('ingest_extend', 10)],
+                         list((result['scenario'], result['rows']) for result in results['results']),
+                         'the results are saved as JSON, for the scenarios that match the filter')
+
+        baseline = {'results': [{'scenario': 'render_md', 'rows': 10, 'seconds': 1.0},
+                                {'scenario': 'render_csv', 'rows': 10, 'seconds': 1.0}]}
+        current = {'results': [{'scenario': 'render_md', 'rows': 10, 'seconds': 1.05},
+                               {'scenario': 'render_csv', 'rows': 10, 'seconds': 1.5},
+                               {'scenario': 'render_tsv', 'rows': 10, 'seconds': 9.0}]}
+        comparison, regressions = bench.compare(current, baseline, threshold=0.1)
+        self.assertEqual(['render_csv[10]'], regressions, 'only slowdowns above the threshold are regressions')
+        self.assertEqual(['ok', 'REGRESSION'], comparison.get_column('Status'),
+                         'benchmarks missing from the baseline are not compared')
+
+
 if __name__ == '__main__':
     import unittest
     unittest.main()